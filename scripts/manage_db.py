@@ -1,13 +1,32 @@
 #!/usr/bin/env python3
 import os
+import re
 import sys
-import chromadb
-from chromadb.config import Settings
 import logging
+from functools import lru_cache
 
-# Configure logging to show fewer details from libraries
-logging.basicConfig(level=logging.ERROR)
+# Number of rows requested from Chroma per page when walking a collection
+PAGE_SIZE = 10000
+# Number of IDs fetched and deleted per round trip when wiping a collection.
+# Kept under SQLite's historical 999 bound-parameter limit so each
+# DELETE ... WHERE id IN (...) stays a small, cheap statement.
+DELETE_BATCH_SIZE = 900
+# Above this many entries the full-scan search fallback asks before running
+LARGE_COLLECTION = 100000
 
+HEADER = "\n".join(["", "=" * 40, "   LOCALBOT DB MANAGER   ", "=" * 40])
+
+ACTION_MENU = "\n".join([
+    "\n--- Managing Collection: {name} ---",
+    "1. View last 5 entries",
+    "2. Search entries (text match)",
+    "3. Delete entry by ID",
+    "4. Clear entire collection (DANGER)",
+    "5. List ALL IDs (can be long)",
+    "6. Back to collections",
+])
+
+@lru_cache(maxsize=1)
 def get_db_path():
     # Assuming script is in /scripts
     script_dir = os.path.dirname(os.path.abspath(__file__))
@@ -31,11 +50,54 @@ def connect_db():
         print(f"Error: Database path not found at {db_path}")
         sys.exit(1)
     
+    # chromadb pulls in numpy/onnxruntime, so only import it once there is
+    # actually a database to open
+    import chromadb
+    from chromadb.config import Settings
+
+    # Configure logging to show fewer details from libraries
+    logging.basicConfig(level=logging.ERROR)
+
     print(f"Connecting to database at: {db_path}")
-    return chromadb.PersistentClient(path=db_path)
+    # Same settings as VectorManager, minus allow_reset: no telemetry ping on
+    # startup, and this tool never needs client.reset()
+    return chromadb.PersistentClient(
+        path=db_path,
+        settings=Settings(anonymized_telemetry=False, allow_reset=False)
+    )
+
+def reconnect(client):
+    # Chroma caches one System per path, so a fresh PersistentClient would
+    # reuse the old SQLite handles unless that cache is cleared first. The
+    # old client is released once the caller rebinds its name to the result.
+    if hasattr(client, "clear_system_cache"):
+        client.clear_system_cache()
+    return connect_db()
+
+def fetch_all_ids(collection):
+    # Page through IDs only (include=[]) so documents/embeddings stay in SQLite
+    ids = []
+    offset = 0
+    while True:
+        page = collection.get(include=[], limit=PAGE_SIZE, offset=offset)
+        if not page['ids']:
+            break
+        ids.extend(page['ids'])
+        offset += PAGE_SIZE
+    return ids
+
+def unpack_result(result):
+    # Chroma leaves documents/metadatas as None when they weren't included;
+    # pad them so the three lists can be zipped together
+    ids = result['ids']
+    documents = result.get('documents') or [None] * len(ids)
+    metadatas = result.get('metadatas') or [None] * len(ids)
+    return ids, documents, metadatas
 
-def list_collections(client):
-    collections = client.list_collections()
+def list_collections(client, collections=None):
+    # Reuse a previously fetched list when given, to avoid re-querying on redraw
+    if collections is None:
+        collections = client.list_collections()
     if not collections:
         print("No collections found.")
         return []
@@ -52,64 +114,139 @@ def view_entries(collection):
     if count == 0:
         return
 
-    # Peek at the last 5 entries
+    # Fetch the last 5 entries. peek() can't restrict include and would ship
+    # the embeddings along, so read the tail with get() instead. Chroma
+    # applies limit/offset to the ID lookup before joining documents and
+    # metadata, so only these 5 rows are loaded; a separate IDs-only query
+    # first would just add a round trip.
     try:
-        peek = collection.peek(limit=5)
+        peek = collection.get(
+            limit=5,
+            offset=max(0, count - 5),
+            include=["documents", "metadatas"],
+        )
         print(f"\nLast 5 entries:")
         
-        ids = peek['ids']
-        documents = peek.get('documents', [])
-        metadatas = peek.get('metadatas', [])
-        
-        for i in range(len(ids)):
-            print(f"\nID: {ids[i]}")
-            if metadatas and i < len(metadatas):
-                print(f"Metadata: {metadatas[i]}")
-            if documents and i < len(documents):
-                doc_text = documents[i] if documents[i] else "[No Content]"
-                # Truncate document content for display
-                doc_preview = doc_text[:100] + "..." if len(doc_text) > 100 else doc_text
-                print(f"Content: {doc_preview}")
+        for doc_id, doc, meta in zip(*unpack_result(peek)):
+            print(f"\nID: {doc_id}")
+            print(f"Metadata: {meta}")
+            doc_text = doc if doc else "[No Content]"
+            # Truncate document content for display via the format spec
+            ellipsis = "..." if len(doc_text) > 100 else ""
+            print(f"Content: {doc_text:.100}{ellipsis}")
             print("-" * 40)
     except Exception as e:
         print(f"Error viewing entries: {e}")
 
+def scan_entries(collection, query, limit=10):
+    # Fallback for matches $contains can't express (mixed case, metadata).
+    # Walks the collection page by page and stops as soon as enough matches
+    # are found. The compiled case-insensitive pattern searches each document
+    # without allocating a lowercased copy of it first.
+    matches = re.compile(re.escape(query), re.IGNORECASE).search
+    found_ids = []
+    documents = []
+    metadatas = []
+    offset = 0
+    while len(found_ids) < limit:
+        page = collection.get(
+            include=["documents", "metadatas"], limit=PAGE_SIZE, offset=offset
+        )
+        if not page['ids']:
+            break
+        for doc_id, doc_text, meta in zip(*unpack_result(page)):
+            # Only stringify the metadata when the document didn't match
+            if not ((doc_text and matches(doc_text))
+                    or (meta and matches(str(meta)))):
+                continue
+            found_ids.append(doc_id)
+            documents.append(doc_text)
+            metadatas.append(meta)
+            if len(found_ids) >= limit:
+                break
+        offset += PAGE_SIZE
+    return found_ids, documents, metadatas
+
 def search_entries(collection):
     query = input("\nEnter search text (case-insensitive substring): ").strip()
     if not query:
         return
 
-    print("Fetching all entries for text search (this might be slow for large DBs)...")
     try:
-        # Get all data to perform manual filtering
-        # Note: Ideally we'd use vector search, but we might not have the embedding function loaded here.
-        all_data = collection.get()
-        
+        total = collection.count()
+        if total == 0:
+            print("Collection is empty.")
+            return
+
+        # Let Chroma run the match in SQLite instead of pulling every
+        # document into Python. $contains is case-sensitive, so the
+        # lowercased query is tried as well to keep the old behaviour.
+        filters = [
+            {"where_document": {"$contains": term}}
+            for term in dict.fromkeys([query, query.lower()])
+        ]
+        # Queries like "source=notes.pdf" or "chunk_id=3" go through the
+        # metadata index first
+        if "=" in query and " " not in query:
+            key, value = query.split("=", 1)
+            # "$and", "#document" and the like are Chroma operators, not
+            # metadata fields; leave such queries to the text match
+            if key and value and not key.startswith(("$", "#")):
+                metadata_filters = [{"where": {key: value}}]
+                if value.lstrip("-").isdigit():
+                    metadata_filters.append({"where": {key: int(value)}})
+                filters = metadata_filters + filters
+
         found_ids = []
-        ids = all_data['ids']
-        documents = all_data.get('documents', [])
-        metadatas = all_data.get('metadatas', [])
-        
+        documents = []
+        metadatas = []
+        for search_filter in filters:
+            if len(found_ids) >= 10:
+                break
+            try:
+                res = collection.get(
+                    limit=10,
+                    include=["documents", "metadatas"],
+                    **search_filter,
+                )
+            except Exception:
+                # Chroma rejected this filter; the remaining ones may still match
+                continue
+            for doc_id, doc_text, meta in zip(*unpack_result(res)):
+                if doc_id in found_ids or len(found_ids) >= 10:
+                    continue
+                found_ids.append(doc_id)
+                documents.append(doc_text)
+                metadatas.append(meta)
+
+        if not found_ids:
+            print("No exact substring match.")
+            if total > LARGE_COLLECTION:
+                confirm = input(
+                    f"Scan all {total} entries case-insensitively? This may be slow. (y/N): "
+                ).lower()
+                if confirm != 'y':
+                    return
+            print("Scanning entries (case-insensitive)...")
+            found_ids, documents, metadatas = scan_entries(collection, query)
+
         print(f"\n--- Search Results for '{query}' ---")
-        
+
         count = 0
-        for i in range(len(ids)):
-            doc_text = documents[i] if documents and i < len(documents) and documents[i] else ""
-            meta_text = str(metadatas[i]) if metadatas and i < len(metadatas) and metadatas[i] else ""
-            
-            if query.lower() in doc_text.lower() or query.lower() in meta_text.lower():
-                count += 1
-                found_ids.append(ids[i])
-                print(f"\nMatch #{count}")
-                print(f"ID: {ids[i]}")
-                print(f"Metadata: {meta_text}")
-                print(f"Content: {doc_text[:150]}...")
-                print("-" * 40)
-                
-                if count >= 10:
-                    print("Showing top 10 matches...")
-                    break
-        
+        for doc_id, doc, meta in zip(found_ids, documents, metadatas):
+            doc_text = doc if doc else ""
+            meta_text = str(meta) if meta else ""
+
+            count += 1
+            print(f"\nMatch #{count}")
+            print(f"ID: {doc_id}")
+            print(f"Metadata: {meta_text}")
+            print(f"Content: {doc_text:.150}...")
+            print("-" * 40)
+
+        if count >= 10:
+            print("Showing top 10 matches...")
+
         if count == 0:
             print("No matches found.")
             
@@ -123,8 +260,9 @@ def delete_entry(collection):
         return
 
     try:
-        # Check if exists
-        result = collection.get(ids=[entry_id])
+        # Check if exists. include=[] keeps the probe to an ID lookup, and
+        # doing it up front avoids asking to confirm an unknown ID.
+        result = collection.get(ids=[entry_id], include=[])
         if not result['ids']:
             print(f"Error: Entry with ID '{entry_id}' not found.")
             return
@@ -144,11 +282,25 @@ def wipe_collection(collection):
     
     if confirm_name == collection.name:
         try:
-            # Delete all entries
-            all_ids = collection.get()['ids']
-            if all_ids:
-                print(f"Deleting {len(all_ids)} entries...")
-                collection.delete(ids=all_ids)
+            # Delete page by page: every delete removes the rows, so the next
+            # get() without an offset naturally returns the following page.
+            # This stays serial on purpose: Chroma writes through a single
+            # SQLite connection, and fetching ahead while a delete is still in
+            # flight would hand back IDs that are already being removed.
+            deleted = 0
+            batches = 0
+            while True:
+                page = collection.get(include=[], limit=DELETE_BATCH_SIZE)['ids']
+                if not page:
+                    break
+                collection.delete(ids=page)
+                deleted += len(page)
+                batches += 1
+                if batches % 10 == 0:
+                    print(f"Deleted {deleted} entries...")
+
+            if deleted:
+                print(f"Deleted {deleted} entries.")
                 print("Collection wiped successfully.")
             else:
                 print("Collection is already empty.")
@@ -159,46 +311,66 @@ def wipe_collection(collection):
 
 def list_all_entries(collection):
     try:
-        all_data = collection.get()
-        ids = all_data['ids']
+        ids = fetch_all_ids(collection)
         if not ids:
              print("Collection is empty.")
              return
 
         print(f"\nTotal entries: {len(ids)}")
-        for i, doc_id in enumerate(ids):
-             print(f"{i+1}. {doc_id}")
+        # One write for the whole listing instead of a print() per ID
+        sys.stdout.write(
+            "\n".join(f"{i+1}. {doc_id}" for i, doc_id in enumerate(ids)) + "\n"
+        )
              
     except Exception as e:
          print(f"Error listing all entries: {e}")
 
 def main():
+    try:
+        # Line editing and history for input(); not available on Windows
+        import readline  # noqa: F401
+    except ImportError:
+        pass
+
     try:
         client = connect_db()
     except Exception as e:
         print(f"Failed to connect to DB: {e}")
         return
 
+    # Collections rarely change while the tool is open; only refresh on
+    # request or when the list came back empty.
+    collections = None
+
     while True:
         try:
-            print("\n" + "="*40)
-            print("   LOCALBOT DB MANAGER   ")
-            print("="*40)
-            collections = list_collections(client)
+            print(HEADER)
+            collections = list_collections(client, collections or None)
             
             if not collections:
                 # If no collections, verify path again or exit
                 print("Database appears empty or locked.")
-                retry = input("Retry? (y/n): ")
-                if retry.lower() != 'y':
+                retry = input("Retry? (y/n, 'c' to reconnect): ").strip().lower()
+                if retry == 'c':
+                    client = reconnect(client)
+                elif retry != 'y':
                     break
                 continue
 
-            print("\nSelect a collection to manage (or 'q' to quit):")
+            print("\nSelect a collection to manage ('r' to refresh, 'c' to reconnect, 'q' to quit):")
             choice = input("> ").strip()
             
             if choice.lower() == 'q':
                 break
+
+            if choice.lower() == 'r':
+                collections = None
+                continue
+
+            if choice.lower() == 'c':
+                collections = None
+                client = reconnect(client)
+                continue
                 
             try:
                 idx = int(choice) - 1
@@ -212,13 +384,7 @@ def main():
                 continue
 
             while True:
-                print(f"\n--- Managing Collection: {selected_col.name} ---")
-                print("1. View last 5 entries")
-                print("2. Search entries (text match)")
-                print("3. Delete entry by ID")
-                print("4. Clear entire collection (DANGER)")
-                print("5. List ALL IDs (can be long)")
-                print("6. Back to collections")
+                print(ACTION_MENU.format(name=selected_col.name))
                 
                 action = input("\nSelect action: ").strip()
                 
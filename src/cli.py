@@ -1,11 +1,16 @@
 """FemtoBot CLI - Command line interface for managing the bot."""
+import atexit
+import contextlib
+import functools
 import os
+import re
+import select
+import shutil
 import sys
 import signal
 import subprocess
 import time
 import click
-import tempfile
 
 # Resolve project root from this file's location
 PROJECT_ROOT = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
@@ -13,7 +18,17 @@ from src.constants import CONFIG_DIR, DATA_DIR
 
 PID_FILE = os.path.join(CONFIG_DIR, "femtobot.pid")
 LOG_FILE = os.path.join(CONFIG_DIR, "femtobot.log")
+LOCK_FILE = os.path.join(CONFIG_DIR, "femtobot.lock")
+# Process group of the bot `start` launched in a session of its own
+PGID_FILE = os.path.join(CONFIG_DIR, "femtobot.pgid")
 BOT_SCRIPT_NAME = "telegram_bot.py"
+# Any command-line argument containing one of these marks a bot process
+BOT_CMDLINE_MARKERS = (BOT_SCRIPT_NAME, "femtobot")
+OLLAMA_URL = "http://localhost:11434"
+OLLAMA_ADDR = ("localhost", 11434)
+# Chunk size for copying file data in and out of backup archives; tarfile's
+# default of 16 KiB means a Python-level read/write pair every 16 KiB
+TAR_BUFSIZE = 2 * 1024 * 1024
 
 # Colors
 GREEN = "green"
@@ -21,21 +36,162 @@ RED = "red"
 YELLOW = "yellow"
 CYAN = "cyan"
 
+# One YAML line: a comment, or a "key: value" pair that isn't a list item
+_YAML_LINE_RE = re.compile(
+    r"^(?:(?P<comment>[ \t]*#.*)|(?P<key>(?![ \t]*-)[^:\n]*):(?P<value>.*))$",
+    re.MULTILINE,
+)
 
+
+# Heavy dependencies are imported on first use only, so quick commands like
+# `stop` or `logs` never pay for them.
+
+@functools.lru_cache(maxsize=None)
+def _httpx():
+    import httpx
+    return httpx
+
+
+@functools.lru_cache(maxsize=None)
+def _yaml():
+    import yaml
+    return yaml
+
+
+@functools.lru_cache(maxsize=None)
+def _yaml_loader():
+    """libyaml's CSafeLoader when PyYAML was built with it, else SafeLoader."""
+    yaml = _yaml()
+    return getattr(yaml, "CSafeLoader", yaml.SafeLoader)
+
+
+@functools.lru_cache(maxsize=None)
+def _json_loads():
+    """orjson.loads when installed (several times faster), else json.loads."""
+    try:
+        import orjson
+        return orjson.loads
+    except ImportError:
+        import json
+        return json.loads
+
+
+@functools.lru_cache(maxsize=None)
+def _chromadb():
+    import chromadb
+    return chromadb
+
+
+@functools.lru_cache(maxsize=None)
+def _ollama_client():
+    """Shared keep-alive client for every Ollama request in this process."""
+    httpx = _httpx()
+    # Ollama is on localhost: a connect either succeeds or is refused right
+    # away, so a long connect timeout only delays the "not running" answer
+    # when something silently drops the packets.
+    client = httpx.Client(
+        base_url=OLLAMA_URL,
+        timeout=httpx.Timeout(3.0, connect=0.3),
+        limits=httpx.Limits(max_keepalive_connections=2),
+    )
+    atexit.register(client.close)
+    return client
+
+
+def _makedirs(path):
+    """Create a directory tree unless it already exists.
+
+    The isdir() check is a single stat; makedirs(exist_ok=True) on an
+    existing directory costs a failed mkdir plus a stat.
+    """
+    if not os.path.isdir(path):
+        os.makedirs(path, exist_ok=True)
+
+
+@functools.lru_cache(maxsize=1)
 def _ensure_dir():
-    """Ensure ~/.femtobot directory exists."""
-    os.makedirs(CONFIG_DIR, exist_ok=True)
+    """Ensure ~/.femtobot directory exists (once per process)."""
+    _makedirs(CONFIG_DIR)
 
 
-def _read_pid():
-    """Read PID from file, return None if not found or invalid."""
+def _enter_config_dir():
+    """chdir into CONFIG_DIR, where the bot resolves its relative paths.
+
+    Skipped when already there, so libraries that cached the working
+    directory at import don't see a change.
+    """
+    if os.getcwd() != CONFIG_DIR:
+        os.chdir(CONFIG_DIR)
+
+
+def _read_int_file(path):
+    """Read an integer from a file, return None if not found or invalid."""
     try:
-        with open(PID_FILE, "r") as f:
+        with open(path, "r") as f:
             return int(f.read().strip())
     except (FileNotFoundError, ValueError):
         return None
 
 
+def _read_pid():
+    """Read PID from file, return None if not found or invalid."""
+    return _read_int_file(PID_FILE)
+
+
+def _read_pgid():
+    """Read the recorded process group of the started bot, or None."""
+    return _read_int_file(PGID_FILE)
+
+
+def _write_int_file(path, value):
+    """Write a file atomically, so readers never see a partial file."""
+    tmp = f"{path}.tmp"
+    with open(tmp, "w") as f:
+        f.write(str(value))
+    os.replace(tmp, path)
+
+
+def _write_pid_file(pid, pgid=None):
+    """Write the PID file, plus the PGID file when the bot owns its group.
+
+    `pgid` is only recorded for a bot started with start_new_session=True;
+    stopping signals the whole group only when this record matches.
+    """
+    if pgid is None:
+        _unlink_missing_ok(PGID_FILE)
+    else:
+        _write_int_file(PGID_FILE, pgid)
+    _write_int_file(PID_FILE, pid)
+
+
+@contextlib.contextmanager
+def _start_lock():
+    """Serialize `start` runs, so two at once can't both spawn a bot."""
+    try:
+        import fcntl
+    except ImportError:
+        # No flock on Windows; fall back to the unlocked check
+        yield
+        return
+    with open(LOCK_FILE, "w") as lock:
+        fcntl.flock(lock, fcntl.LOCK_EX)
+        yield
+
+
+def _unlink_missing_ok(path):
+    """Delete a file, ignoring it if it is already gone."""
+    try:
+        os.unlink(path)
+    except FileNotFoundError:
+        pass
+
+
+def _remove_pid_file():
+    """Delete the PID file and its PGID record if they exist."""
+    _unlink_missing_ok(PID_FILE)
+    _unlink_missing_ok(PGID_FILE)
+
+
 def _is_running(pid):
     """Check if a process with given PID is running."""
     if pid is None:
@@ -47,14 +203,110 @@ def _is_running(pid):
         return False
 
 
+def _process_uptime(pid):
+    """Return how many seconds a process has been running, or None.
+
+    Uses the starttime field of /proc/<pid>/stat (clock ticks since boot);
+    the mtime of /proc/<pid> is not the start time and can drift.
+    """
+    try:
+        with open(f"/proc/{pid}/stat", "rb") as f:
+            stat = f.read()
+        with open("/proc/uptime", "rb") as f:
+            since_boot = float(f.read().split()[0])
+    except (OSError, ValueError, IndexError):
+        return None
+    # comm (field 2) may contain spaces, so count fields after its ")".
+    # starttime is field 22 overall, the 20th after comm.
+    try:
+        start_ticks = int(stat.rsplit(b")", 1)[1].split()[19])
+    except (IndexError, ValueError):
+        return None
+    return max(0.0, since_boot - start_ticks / os.sysconf("SC_CLK_TCK"))
+
+
+def _wait_for_exit(pid, timeout=5.0):
+    """Wait for a process to exit. Returns True if it is gone within timeout.
+
+    Uses a pidfd on Linux so we wake up as soon as the process dies, and
+    falls back to polling elsewhere.
+    """
+    try:
+        fd = os.pidfd_open(pid)
+    except ProcessLookupError:
+        return True
+    except (AttributeError, OSError):
+        deadline = time.monotonic() + timeout
+        while _is_running(pid):
+            if time.monotonic() >= deadline:
+                return False
+            time.sleep(0.05)
+        return True
+
+    try:
+        return _poll_pidfd(fd, timeout)
+    finally:
+        os.close(fd)
+
+
+def _wait_for_exits(pids, timeout):
+    """Wait for several processes at once. Returns the PIDs still alive.
+
+    All pidfds are registered with one poll() object, so each exit is seen
+    as it happens and the total wait is bounded by `timeout`, not by
+    `timeout` per process.
+    """
+    fds = {}
+    try:
+        for pid in pids:
+            try:
+                fds[os.pidfd_open(pid)] = pid
+            except ProcessLookupError:
+                continue
+            except (AttributeError, OSError):
+                # No pidfds here; wait one by one instead
+                return [p for p in pids if not _wait_for_exit(p, timeout=timeout)]
+
+        poller = select.poll()
+        for fd in fds:
+            poller.register(fd, select.POLLIN)
+        pending = set(fds)
+        deadline = time.monotonic() + timeout
+        while pending:
+            remaining = deadline - time.monotonic()
+            if remaining <= 0:
+                break
+            for fd, _ in poller.poll(remaining * 1000):
+                poller.unregister(fd)
+                pending.discard(fd)
+        return [fds[fd] for fd in pending]
+    finally:
+        for fd in fds:
+            os.close(fd)
+
+
+def _poll_pidfd(fd, timeout):
+    """Wait until a pidfd reports that its process exited."""
+    # poll() instead of select(): select() can't watch fds past FD_SETSIZE
+    poller = select.poll()
+    poller.register(fd, select.POLLIN)
+    return bool(poller.poll(timeout * 1000))
+
+
+@functools.lru_cache(maxsize=None)
 def _ensure_psutil():
-    """Ensure psutil is installed, install if missing."""
+    """Ensure psutil is installed, install if missing.
+
+    Memoised: stop/restart look it up several times per run, and only the
+    first call should ever reach the pip fallback.
+    """
     try:
         import psutil
         return psutil
     except ImportError:
         click.secho("⚠ Installing required dependency: psutil...", fg=YELLOW)
-        python = _get_python()
+        ctx = click.get_current_context(silent=True)
+        python = ctx.obj["python"] if ctx and ctx.obj else _get_python()
         result = subprocess.run(
             [python, "-m", "pip", "install", "psutil>=5.9.0", "--quiet"],
             capture_output=True,
@@ -70,72 +322,376 @@ def _ensure_psutil():
         return psutil
 
 
-def _kill_all_bot_processes():
-    """Kill all processes related to the bot including children."""
+def _shutdown_process(pid, group=False):
+    """Stop a process by escalating SIGINT -> SIGTERM -> SIGKILL.
+
+    SIGINT lets the bot's asyncio loop shut down at a safe point; SIGKILL is
+    only sent if both polite signals are ignored. Returns the signal that
+    finally stopped the process.
+
+    On Linux the signals go through a pidfd opened up front, so they can't
+    reach an unrelated process that reused the PID in the meantime. With
+    `group=True`, `pid` must lead its process group and every signal goes to
+    the whole group; once the leader is gone any member still left is
+    killed.
+    """
+    try:
+        pidfd = os.pidfd_open(pid)
+    except ProcessLookupError:
+        return signal.SIGINT
+    except (AttributeError, OSError):
+        pidfd = None
+
+    try:
+        escalation = ((signal.SIGINT, 1), (signal.SIGTERM, 4), (signal.SIGKILL, 1))
+        for sig, timeout in escalation:
+            try:
+                if group:
+                    os.killpg(pid, sig)
+                elif pidfd is None:
+                    os.kill(pid, sig)
+                else:
+                    signal.pidfd_send_signal(pidfd, sig)
+            except ProcessLookupError:
+                return sig
+            if pidfd is None:
+                exited = _wait_for_exit(pid, timeout=timeout)
+            else:
+                exited = _poll_pidfd(pidfd, timeout)
+            if exited:
+                break
+        if group:
+            try:
+                os.killpg(pid, signal.SIGKILL)
+            except ProcessLookupError:
+                pass
+        return sig
+    finally:
+        if pidfd is not None:
+            os.close(pidfd)
+
+
+def _shutdown_process_tree(pid):
+    """Stop a process and its children one by one, children first.
+
+    Used for bots that weren't started by `femtobot start`, whose process
+    group may be shared with unrelated processes.
+    """
     psutil = _ensure_psutil()
+    try:
+        children = psutil.Process(pid).children(recursive=True)
+    except psutil.NoSuchProcess:
+        raise ProcessLookupError(pid)
     
-    killed = []
-    errors = []
+    # Kill children first
+    for child in children:
+        try:
+            child.terminate()
+        except psutil.NoSuchProcess:
+            pass
+    
+    # Wait for children
+    gone, alive = psutil.wait_procs(children, timeout=2)
+    
+    # Force kill if still alive
+    for child in alive:
+        try:
+            child.kill()
+        except psutil.NoSuchProcess:
+            pass
     
-    # Find all python processes running telegram_bot.py
+    return _shutdown_process(pid)
+
+
+def _is_bot_process(name, cmdline, markers=BOT_CMDLINE_MARKERS):
+    """Check whether a process name and argument list belong to the bot.
+
+    The bot is a python process with one of `markers` in an argument.
+    Arguments are checked one by one instead of joining the cmdline.
+    """
+    if not name or 'python' not in name.lower():
+        return False
+    return any(marker in arg for arg in cmdline or () for marker in markers)
+
+
+def _cmdline_args(raw):
+    """Split the raw bytes of /proc/<pid>/cmdline into arguments."""
+    return raw.decode("utf-8", errors="replace").rstrip("\0").split("\0")
+
+
+def _pid_is_bot(pid):
+    """Check that one specific PID, e.g. from the PID file, is a bot process.
+
+    A PID file left behind by a crash can name a PID that has since been
+    reused by an unrelated process, which must never be signalled.
+    """
+    if sys.platform.startswith("linux"):
+        try:
+            with open(f"/proc/{pid}/cmdline", "rb") as f:
+                args = _cmdline_args(f.read())
+        except OSError:
+            return False
+        return _is_bot_process(os.path.basename(args[0]), args)
+
+    psutil = _ensure_psutil()
+    try:
+        proc = psutil.Process(pid)
+        return _is_bot_process(proc.name(), proc.cmdline())
+    except (psutil.NoSuchProcess, psutil.AccessDenied):
+        return False
+
+
+def _find_bot_pids():
+    """Return the PIDs of running bot processes, excluding this CLI itself."""
+    me = os.getpid()
+    pids = []
+    if sys.platform.startswith("linux"):
+        # One read of /proc/<pid>/cmdline per process is all the match needs;
+        # psutil would build a Process object and read several files each.
+        with os.scandir("/proc") as it:
+            for entry in it:
+                if not entry.name.isdigit() or int(entry.name) == me:
+                    continue
+                try:
+                    with open(f"/proc/{entry.name}/cmdline", "rb") as f:
+                        raw = f.read()
+                except OSError:
+                    continue
+                # Cheap bytes check first; kernel threads have no cmdline
+                if b"python" not in raw:
+                    continue
+                args = _cmdline_args(raw)
+                if _is_bot_process(os.path.basename(args[0]), args):
+                    pids.append(int(entry.name))
+        return pids
+
+    psutil = _ensure_psutil()
     for proc in psutil.process_iter(['pid', 'name', 'cmdline']):
         try:
             pinfo = proc.info
-            if pinfo['name'] and 'python' in pinfo['name'].lower():
-                cmdline = ' '.join(pinfo['cmdline'] or [])
-                if BOT_SCRIPT_NAME in cmdline or 'femtobot' in cmdline:
-                    try:
-                        # Kill the process tree
-                        parent = psutil.Process(pinfo['pid'])
-                        children = parent.children(recursive=True)
-                        
-                        # Kill children first
-                        for child in children:
-                            try:
-                                child.terminate()
-                            except psutil.NoSuchProcess:
-                                pass
-                        
-                        # Wait for children
-                        gone, alive = psutil.wait_procs(children, timeout=2)
-                        
-                        # Force kill if still alive
-                        for child in alive:
-                            try:
-                                child.kill()
-                            except psutil.NoSuchProcess:
-                                pass
-                        
-                        # Kill parent
-                        parent.terminate()
-                        try:
-                            parent.wait(timeout=2)
-                        except psutil.TimeoutExpired:
-                            parent.kill()
-                        
-                        killed.append(pinfo['pid'])
-                    except Exception as e:
-                        errors.append(f"PID {pinfo['pid']}: {e}")
+            if pinfo['pid'] != me and _is_bot_process(pinfo['name'], pinfo['cmdline']):
+                pids.append(pinfo['pid'])
         except (psutil.NoSuchProcess, psutil.AccessDenied):
             continue
+    return pids
+
+
+def _stop_bot_process(pid, session_pgid):
+    """Stop one bot process and its children. Returns the final signal.
+
+    killpg() is only used for the group recorded in the PGID file by
+    `start` (`session_pgid`). A bot run as a shell job, e.g. `femtobot
+    serve | tee bot.log`, also leads its process group but shares it with
+    the rest of the pipeline, so it is stopped process by process instead.
+    """
+    if pid == session_pgid and os.getpgid(pid) == pid:
+        # The bot and all of its children share one process group, so each
+        # step of the escalation is a single killpg() for the whole tree.
+        return _shutdown_process(pid, group=True)
+    return _shutdown_process_tree(pid)
+
+
+def _kill_all_bot_processes(bot_pids=None):
+    """Kill all processes related to the bot including children.
+
+    `bot_pids` is the result of an earlier `_find_bot_pids()` call, if the
+    caller already has one. Returns (killed, errors, forced) where `forced`
+    lists the PIDs that only died to SIGKILL.
+    """
+    if bot_pids is None:
+        bot_pids = _find_bot_pids()
     
-    # Also try to kill by PID file if exists
-    pid = _read_pid()
-    if pid and pid not in killed:
+    killed = []
+    errors = []
+    forced = []
+    session_pgid = _read_pgid()
+    
+    for bot_pid in bot_pids:
         try:
-            os.kill(pid, signal.SIGTERM)
-            time.sleep(1)
-            if _is_running(pid):
-                os.kill(pid, signal.SIGKILL)
-                time.sleep(0.5)
+            sig = _stop_bot_process(bot_pid, session_pgid)
+            if sig == signal.SIGKILL:
+                forced.append(bot_pid)
+            
+            killed.append(bot_pid)
         except ProcessLookupError:
-            pass
+            # Exited on its own (or with an earlier process group)
+            continue
         except Exception as e:
-            errors.append(f"PID file {pid}: {e}")
+            errors.append(f"PID {bot_pid}: {e}")
     
-    return killed, errors
+    # Also try to kill by PID file if exists, but only once the PID is
+    # confirmed to still be the bot; otherwise the file is just stale.
+    pid = _read_pid()
+    if pid and pid not in killed:
+        if not _pid_is_bot(pid):
+            _remove_pid_file()
+        else:
+            try:
+                if _stop_bot_process(pid, session_pgid) == signal.SIGKILL:
+                    forced.append(pid)
+            except ProcessLookupError:
+                pass
+            except Exception as e:
+                errors.append(f"PID file {pid}: {e}")
+    
+    return killed, errors, forced
+
+
+def _fadvise(f, advice):
+    """Pass an access-pattern hint for an open file to the kernel, if supported."""
+    if hasattr(os, "posix_fadvise"):
+        os.posix_fadvise(f.fileno(), 0, 0, getattr(os, advice))
+
+
+def _tail_file(path, lines, block_size=8192):
+    """Return the last `lines` lines of a file and the offset it was read up to.
+
+    Reads fixed-size blocks backwards from the end, so only the tail of a
+    large log is ever loaded.
+    """
+    with open(path, "rb") as f:
+        # Reading backwards: kernel readahead past each block would be wasted
+        _fadvise(f, "POSIX_FADV_RANDOM")
+        end = pos = f.seek(0, os.SEEK_END)
+        blocks = []
+        newlines = 0
+        while pos > 0 and newlines <= lines:
+            step = min(block_size, pos)
+            pos -= step
+            f.seek(pos)
+            block = f.read(step)
+            blocks.append(block)
+            newlines += block.count(b"\n")
+
+    data = b"".join(reversed(blocks))
+    tail = data.splitlines(keepends=True)[-lines:] if lines > 0 else []
+    return b"".join(tail).decode("utf-8", errors="replace"), end
+
+
+def _follow_file(path, offset, interval=0.2):
+    """Print data appended to a file after `offset` until interrupted."""
+    with open(path, "rb") as f:
+        _fadvise(f, "POSIX_FADV_SEQUENTIAL")
+        f.seek(offset)
+        while True:
+            chunk = f.read()
+            if chunk:
+                click.echo(chunk.decode("utf-8", errors="replace"), nl=False)
+                continue
+            # Start over if the log was truncated underneath us
+            if os.fstat(f.fileno()).st_size < f.tell():
+                f.seek(0)
+            time.sleep(interval)
+
+
+def _human_bytes(size):
+    """Format a byte count as KB or MB."""
+    if size >= 1024 * 1024:
+        return f"{size / 1024 / 1024:.1f} MB"
+    return f"{size / 1024:.1f} KB"
+
+
+def _dir_size(path):
+    """Disk space in bytes used by all files under a directory.
+
+    Uses os.scandir so file types come from the directory listing and each
+    file costs a single stat. Counts allocated blocks rather than st_size,
+    so sparse sqlite/HNSW files aren't overstated; Windows has no st_blocks
+    and falls back to the apparent size.
+    """
+    on_disk = hasattr(os.stat_result, "st_blocks")
+    total = 0
+    stack = [path]
+    while stack:
+        with os.scandir(stack.pop()) as it:
+            for entry in it:
+                if entry.is_dir(follow_symlinks=False):
+                    stack.append(entry.path)
+                    continue
+                st = entry.stat(follow_symlinks=False)
+                total += st.st_blocks * 512 if on_disk else st.st_size
+    return total
+
+
+def _colorize_yaml(content):
+    """Return YAML text with comments dimmed and keys highlighted."""
+    def _style(match):
+        if match.group("comment") is not None:
+            return click.style(match.group("comment"), fg="bright_black")
+        return click.style(match.group("key") + ":", fg=CYAN) + match.group("value")
+
+    return _YAML_LINE_RE.sub(_style, content)
+
+
+def _safe_member(member, dest):
+    """Check that a tar member extracts inside `dest` (no absolute paths or ..)."""
+    if os.path.isabs(member.name):
+        return False
+    dest = os.path.realpath(dest)
+    target = os.path.realpath(os.path.join(dest, member.name))
+    return os.path.commonpath([dest, target]) == dest
+
+
+def _sendfile_to_stdout(path):
+    """Copy a file to stdout with os.sendfile. Returns False if unsupported."""
+    try:
+        out_fd = sys.stdout.fileno()
+    except (AttributeError, ValueError, OSError):
+        return False
+
+    sys.stdout.flush()
+    with open(path, "rb") as f:
+        size = os.fstat(f.fileno()).st_size
+        offset = 0
+        while offset < size:
+            try:
+                sent = os.sendfile(out_fd, f.fileno(), offset, size - offset)
+            except OSError:
+                if offset == 0:
+                    return False
+                raise
+            if sent == 0:
+                break
+            offset += sent
+    return True
+
+
+def _run_streaming(cmd, cwd=None, keep=32):
+    """Run a command, echoing its output line by line as it arrives.
+
+    stderr is merged into stdout. Only the last `keep` lines are held in
+    memory. Returns (returncode, tail) where tail is those lines joined.
+    """
+    from collections import deque
+
+    tail = deque(maxlen=keep)
+    with subprocess.Popen(
+        cmd,
+        cwd=cwd,
+        stdout=subprocess.PIPE,
+        stderr=subprocess.STDOUT,
+        text=True,
+        bufsize=1,
+    ) as proc:
+        for line in proc.stdout:
+            click.secho(f"    {line.rstrip()}", fg="bright_black")
+            tail.append(line)
+    return proc.returncode, "".join(tail)
+
+
+@functools.lru_cache(maxsize=1)
+def _load_config():
+    """Parse config.yaml once per invocation. Returns None if it is missing."""
+    config_path = os.path.join(CONFIG_DIR, "config.yaml")
+    # Let open() report a missing file instead of stat-ing it first
+    try:
+        with open(config_path, "r") as f:
+            return _yaml().load(f, Loader=_yaml_loader()) or {}
+    except FileNotFoundError:
+        return None
 
 
+@functools.lru_cache(maxsize=1)
 def _get_python():
     """Get the Python executable path (prefer venv if available)."""
     venv_python = os.path.join(PROJECT_ROOT, "venv_bot", "bin", "python")
@@ -144,24 +700,80 @@ def _get_python():
     return sys.executable
 
 
-def _check_ollama():
-    """Check if Ollama is reachable."""
+# Last /api/tags response, shared by every check within one command
+_tags_cache = {"ts": 0.0, "data": None}
+
+
+def _get_ollama_tags(ttl=5):
+    """Query Ollama's /api/tags once and reuse the answer for `ttl` seconds.
+
+    Returns a (reachable, model_names, ordered_names) tuple: a set for
+    membership tests and the names in the order Ollama listed them.
+    """
+    now = time.monotonic()
+    if _tags_cache["data"] is not None and now - _tags_cache["ts"] < ttl:
+        return _tags_cache["data"]
+
     try:
-        import httpx
-        r = httpx.get("http://localhost:11434/api/tags", timeout=3)
-        return r.status_code == 200
+        r = _ollama_client().get("/api/tags")
+        reachable = r.status_code == 200
+        # Only the names are used, so don't keep the per-model dicts around
+        if reachable:
+            names = [m["name"] for m in _json_loads()(r.content).get("models", ())]
+        else:
+            names = []
     except Exception:
+        reachable, names = False, []
+
+    data = (reachable, set(names), names)
+    _tags_cache["ts"] = now
+    _tags_cache["data"] = data
+    return data
+
+
+def _ollama_error(response):
+    """Return the message of Ollama's JSON {"error": ...} body, if any.
+
+    A 404 with such a body means e.g. an unknown model; without one it
+    comes from an Ollama too old to have the endpoint at all.
+    """
+    try:
+        body = _json_loads()(response.content)
+    except ValueError:
+        return None
+    return body.get("error") if isinstance(body, dict) else None
+
+
+def _check_ollama(timeout=0.2):
+    """Check if Ollama is reachable.
+
+    Callers only need to know that something is listening, so a bare TCP
+    connect is enough; it skips importing httpx and the /api/tags round
+    trip. Commands that need the model list use _get_ollama_tags().
+    """
+    import socket
+    try:
+        socket.create_connection(OLLAMA_ADDR, timeout=timeout).close()
+        return True
+    except OSError:
         return False
 
 
 @click.group()
 @click.version_option(version="1.0.0", prog_name="FemtoBot")
-def cli():
+@click.pass_context
+def cli(ctx):
     """🤖 FemtoBot - Smart personal assistant for local LLMs.
 
     Manage your FemtoBot instance from the command line.
     """
-    pass
+    # Make the project importable for every subcommand, exactly once
+    if PROJECT_ROOT not in sys.path:
+        sys.path.insert(0, PROJECT_ROOT)
+
+    # Per-invocation invariants, resolved once and shared with subcommands
+    ctx.ensure_object(dict)
+    ctx.obj["python"] = _get_python()
 
 
 @cli.command()
@@ -178,8 +790,7 @@ def serve():
 
     # Ensure we're in the config directory for relative paths
     _ensure_dir()
-    os.chdir(CONFIG_DIR)
-    sys.path.insert(0, PROJECT_ROOT)
+    _enter_config_dir()
 
     # Check Ollama
     if _check_ollama():
@@ -192,73 +803,98 @@ def serve():
     main()
 
 
-@cli.command()
-def start():
-    """Start the Telegram bot as a background daemon."""
-    _ensure_dir()
+def _start_bot(python, check_ollama=True):
+    """Spawn the bot daemon with `python` unless it is already running.
 
-    pid = _read_pid()
-    if _is_running(pid):
-        click.secho(f"⚠ FemtoBot is already running (PID {pid})", fg=YELLOW)
-        return
-
-    # Check Ollama
-    if not _check_ollama():
-        click.secho("⚠ Ollama is not running. Start it with 'ollama serve'", fg=YELLOW)
-
-    click.secho("🚀 Starting FemtoBot daemon...", fg=CYAN)
+    Shared by `start` and `restart`, which call it directly in the same CLI
+    process.
+    """
+    _ensure_dir()
 
-    python = _get_python()
-    bot_script = os.path.join(PROJECT_ROOT, "src", "telegram_bot.py")
+    # Hold the lock from the "already running?" check until the PID file is
+    # written, otherwise two concurrent starts can both see no bot.
+    with _start_lock():
+        pid = _read_pid()
+        if _is_running(pid):
+            click.secho(f"⚠ FemtoBot is already running (PID {pid})", fg=YELLOW)
+            return
 
-    with open(LOG_FILE, "a") as log:
-        proc = subprocess.Popen(
-            [python, bot_script],
-            cwd=CONFIG_DIR,
-            stdout=log,
-            stderr=log,
-            start_new_session=True,
-        )
+        # Check Ollama in the background: the probe and the spawn don't depend
+        # on each other, so a slow or absent Ollama shouldn't delay the start.
+        probe = None
+        if check_ollama:
+            from concurrent.futures import ThreadPoolExecutor
+            pool = ThreadPoolExecutor(max_workers=1)
+            probe = pool.submit(_check_ollama)
+            pool.shutdown(wait=False)
+
+        click.secho("🚀 Starting FemtoBot daemon...", fg=CYAN)
+
+        bot_script = os.path.join(PROJECT_ROOT, "src", "telegram_bot.py")
+
+        # The bot runs as its own interpreter rather than a multiprocessing
+        # child: it has to use the venv python, outlive this short-lived CLI
+        # process, and a forkserver started here would redo the same imports
+        # on every invocation anyway.
+        # No preexec_fn/uid/gid changes, so CPython spawns through vfork() and
+        # never copies the CLI's page tables. close_fds stays on: the daemon
+        # should not inherit anything but its log.
+        # The child writes to the log fd directly, so buffering on our side of
+        # the file object doesn't matter; PYTHONUNBUFFERED makes the bot's own
+        # print()s reach the file right away instead of in 8 KB blocks.
+        env = {**os.environ, "PYTHONUNBUFFERED": "1"}
+        with open(LOG_FILE, "a") as log:
+            proc = subprocess.Popen(
+                [python, bot_script],
+                cwd=CONFIG_DIR,
+                env=env,
+                stdin=subprocess.DEVNULL,
+                stdout=log,
+                stderr=log,
+                start_new_session=True,
+            )
 
-    with open(PID_FILE, "w") as f:
-        f.write(str(proc.pid))
+        # start_new_session made the bot the leader of a new process group
+        # that holds only the bot and its children
+        _write_pid_file(proc.pid, pgid=proc.pid)
 
-    # Brief wait to check if process started successfully
-    time.sleep(1)
-    if _is_running(proc.pid):
+    # Give the bot a second to fail on startup. The pidfd wait returns as
+    # soon as it dies instead of always sleeping; proc.poll() reaps it,
+    # since an unreaped child still answers kill(pid, 0).
+    if not (_wait_for_exit(proc.pid, timeout=1) or proc.poll() is not None):
         click.secho(f"✓ FemtoBot started (PID {proc.pid})", fg=GREEN)
         click.echo(f"  Logs: {LOG_FILE}")
     else:
         click.secho("✗ FemtoBot failed to start. Check logs:", fg=RED)
         click.echo(f"  {LOG_FILE}")
 
+    if probe is not None and not probe.result():
+        click.secho("⚠ Ollama is not running. Start it with 'ollama serve'", fg=YELLOW)
+
 
 @cli.command()
-def stop():
-    """Stop the running FemtoBot daemon (kills all processes)."""
+@click.option("--no-ollama-check", is_flag=True, help="Don't check whether Ollama is running")
+@click.pass_context
+def start(ctx, no_ollama_check):
+    """Start the Telegram bot as a background daemon."""
+    _start_bot(ctx.obj["python"], check_ollama=not no_ollama_check)
+
+
+def _stop_bot():
+    """Stop every bot process and clean up the PID file.
+
+    Shared by `stop` and `restart`. Returns False if nothing was running.
+    """
     pid = _read_pid()
     
-    # Ensure psutil is available
-    psutil = _ensure_psutil()
-    
     # Check if any bot processes are running
-    bot_procs = []
-    for proc in psutil.process_iter(['pid', 'name', 'cmdline']):
-        try:
-            pinfo = proc.info
-            if pinfo['name'] and 'python' in pinfo['name'].lower():
-                cmdline = ' '.join(pinfo['cmdline'] or [])
-                if BOT_SCRIPT_NAME in cmdline or 'femtobot' in cmdline:
-                    bot_procs.append(pinfo['pid'])
-        except (psutil.NoSuchProcess, psutil.AccessDenied):
-            continue
+    bot_procs = _find_bot_pids()
     
-    if not bot_procs and not _is_running(pid):
+    if not bot_procs and not (_is_running(pid) and _pid_is_bot(pid)):
         click.secho("⚠ FemtoBot is not running", fg=YELLOW)
         # Clean stale PID file
-        if os.path.exists(PID_FILE):
-            os.remove(PID_FILE)
-        return
+        _remove_pid_file()
+        return False
 
     if bot_procs:
         click.secho(f"Found {len(bot_procs)} bot process(es): {bot_procs}", fg=CYAN)
@@ -266,7 +902,7 @@ def stop():
         click.secho(f"Stopping FemtoBot (PID {pid})...", fg=CYAN)
 
     # Kill all bot processes
-    killed, errors = _kill_all_bot_processes()
+    killed, errors, forced = _kill_all_bot_processes(bot_procs)
     
     if killed:
         click.secho(f"✓ Killed {len(killed)} process(es): {killed}", fg=GREEN)
@@ -274,150 +910,107 @@ def stop():
     if errors:
         click.secho(f"⚠ Errors during kill: {errors}", fg=YELLOW)
 
+    if forced:
+        # A healthy bot exits on SIGINT/SIGTERM; needing SIGKILL usually means
+        # it is stuck in a shutdown or signal handler and worth investigating.
+        click.secho(f"⚠ Process(es) {forced} ignored SIGINT/SIGTERM and had to be "
+                    "killed with SIGKILL. Check the logs for a hung shutdown.", fg=YELLOW)
+
     # Clean PID file
-    if os.path.exists(PID_FILE):
-        os.remove(PID_FILE)
+    _remove_pid_file()
     
-    # Double check no processes remain
-    time.sleep(0.5)
-    remaining = []
-    for proc in psutil.process_iter(['pid', 'name', 'cmdline']):
-        try:
-            pinfo = proc.info
-            if pinfo['name'] and 'python' in pinfo['name'].lower():
-                cmdline = ' '.join(pinfo['cmdline'] or [])
-                if BOT_SCRIPT_NAME in cmdline or 'femtobot' in cmdline:
-                    remaining.append(pinfo['pid'])
-        except (psutil.NoSuchProcess, psutil.AccessDenied):
-            continue
+    # Double check no processes remain. Everything killed above has already
+    # been waited on, so no extra sleep is needed here.
+    remaining = _find_bot_pids()
     
+    if remaining:
+        click.secho(f"⚠ Warning: {len(remaining)} process(es) still alive, attempting force kill...", fg=YELLOW)
+        for rpid in remaining:
+            try:
+                os.kill(rpid, signal.SIGKILL)
+            except ProcessLookupError:
+                pass
+        remaining = _wait_for_exits(remaining, timeout=0.5)
+
     if remaining:
         click.secho(f"✗ Warning: {len(remaining)} process(es) still alive: {remaining}", fg=RED)
         click.secho("  You may need to kill them manually with: kill -9 " + " ".join(map(str, remaining)))
     else:
         click.secho("✓ FemtoBot stopped completely (0 processes remaining)", fg=GREEN)
+    return True
+
+
+@cli.command()
+def stop():
+    """Stop the running FemtoBot daemon (kills all processes)."""
+    _stop_bot()
 
 
 @cli.command()
 @click.pass_context
 def restart(ctx):
     """Restart the FemtoBot daemon (stop all processes + start)."""
-    # Ensure psutil is available
-    psutil = _ensure_psutil()
-    
-    # Check for existing processes
-    bot_procs = []
-    for proc in psutil.process_iter(['pid', 'name', 'cmdline']):
-        try:
-            pinfo = proc.info
-            if pinfo['name'] and 'python' in pinfo['name'].lower():
-                cmdline = ' '.join(pinfo['cmdline'] or [])
-                if BOT_SCRIPT_NAME in cmdline or 'femtobot' in cmdline:
-                    bot_procs.append(pinfo['pid'])
-        except (psutil.NoSuchProcess, psutil.AccessDenied):
-            continue
-    
-    pid = _read_pid()
-    
-    # Stop all processes
-    if bot_procs or _is_running(pid):
-        if bot_procs:
-            click.secho(f"Stopping {len(bot_procs)} bot process(es): {bot_procs}...", fg=CYAN)
-        else:
-            click.secho(f"Stopping FemtoBot (PID {pid})...", fg=CYAN)
-        
-        killed, errors = _kill_all_bot_processes()
-        
-        if killed:
-            click.secho(f"✓ Killed {len(killed)} process(es)", fg=GREEN)
-        
-        if errors:
-            click.secho(f"⚠ Some errors occurred: {errors}", fg=YELLOW)
-        
-        if os.path.exists(PID_FILE):
-            os.remove(PID_FILE)
-        
-        # Wait to ensure all processes are dead
-        time.sleep(1)
-        
-        # Verify all processes are dead
-        remaining = []
-        for proc in psutil.process_iter(['pid', 'name', 'cmdline']):
-            try:
-                pinfo = proc.info
-                if pinfo['name'] and 'python' in pinfo['name'].lower():
-                    cmdline = ' '.join(pinfo['cmdline'] or [])
-                    if BOT_SCRIPT_NAME in cmdline or 'femtobot' in cmdline:
-                        remaining.append(pinfo['pid'])
-            except (psutil.NoSuchProcess, psutil.AccessDenied):
-                continue
-        
-        if remaining:
-            click.secho(f"⚠ Warning: {len(remaining)} process(es) still alive, attempting force kill...", fg=YELLOW)
-            for rpid in remaining:
-                try:
-                    os.kill(rpid, signal.SIGKILL)
-                except:
-                    pass
-            time.sleep(0.5)
-        
-        click.secho("✓ All bot processes stopped", fg=GREEN)
-    else:
-        click.secho("⚠ No running bot processes found", fg=YELLOW)
+    _stop_bot()
 
     # Start
     click.echo()
-    ctx.invoke(start)
-
+    _start_bot(ctx.obj["python"])
 
 
 @cli.command()
-def status():
+@click.option("--json", "as_json", is_flag=True, help="Print machine-readable JSON")
+def status(as_json):
     """Show FemtoBot status (running, PID, Ollama, etc)."""
-    click.secho("=== FemtoBot Status ===", fg=CYAN, bold=True)
+    pid = _read_pid()
+    running = _is_running(pid)
+    # Show uptime via /proc if available
+    uptime = _process_uptime(pid) if running else None
+    reachable, _, models = _get_ollama_tags()
+    try:
+        log_size = os.stat(LOG_FILE).st_size
+    except OSError:
+        log_size = None
+
+    if as_json:
+        import json
+        click.echo(json.dumps({
+            "running": running,
+            "pid": pid if running else None,
+            "uptime_s": int(uptime) if uptime is not None else None,
+            "ollama": reachable,
+            "models": models,
+            "log_size": log_size,
+        }))
+        return
+
+    # Collect every line first and print them in one go
+    out = [click.style("=== FemtoBot Status ===", fg=CYAN, bold=True)]
 
     # Bot process
-    pid = _read_pid()
-    if _is_running(pid):
-        click.secho(f"  Bot:    ✓ Running (PID {pid})", fg=GREEN)
-        # Show uptime via /proc if available
-        try:
-            stat = os.stat(f"/proc/{pid}")
-            import datetime
-            started = datetime.datetime.fromtimestamp(stat.st_mtime)
-            uptime = datetime.datetime.now() - started
-            hours, remainder = divmod(int(uptime.total_seconds()), 3600)
+    if running:
+        out.append(click.style(f"  Bot:    ✓ Running (PID {pid})", fg=GREEN))
+        if uptime is not None:
+            hours, remainder = divmod(int(uptime), 3600)
             minutes, seconds = divmod(remainder, 60)
-            click.echo(f"  Uptime: {hours}h {minutes}m {seconds}s")
-        except (FileNotFoundError, OSError):
-            pass
+            out.append(f"  Uptime: {hours}h {minutes}m {seconds}s")
     else:
-        click.secho("  Bot:    ✗ Stopped", fg=RED)
+        out.append(click.style("  Bot:    ✗ Stopped", fg=RED))
 
     # Ollama
-    if _check_ollama():
-        click.secho("  Ollama: ✓ Running", fg=GREEN)
-        try:
-            import httpx
-            r = httpx.get("http://localhost:11434/api/tags", timeout=3)
-            models = r.json().get("models", [])
-            if models:
-                loaded = [m["name"] for m in models]
-                click.echo(f"  Models: {', '.join(loaded)}")
-        except Exception:
-            pass
+    if reachable:
+        out.append(click.style("  Ollama: ✓ Running", fg=GREEN))
+        if models:
+            out.append(f"  Models: {', '.join(models)}")
     else:
-        click.secho("  Ollama: ✗ Not running", fg=RED)
+        out.append(click.style("  Ollama: ✗ Not running", fg=RED))
 
     # Log file
-    if os.path.exists(LOG_FILE):
-        size = os.path.getsize(LOG_FILE)
-        if size > 1024 * 1024:
-            click.echo(f"  Log:    {LOG_FILE} ({size / 1024 / 1024:.1f} MB)")
-        else:
-            click.echo(f"  Log:    {LOG_FILE} ({size / 1024:.1f} KB)")
+    if log_size is not None:
+        out.append(f"  Log:    {LOG_FILE} ({_human_bytes(log_size)})")
     else:
-        click.echo("  Log:    (no logs yet)")
+        out.append("  Log:    (no logs yet)")
+
+    click.echo("\n".join(out))
 
 
 @cli.command()
@@ -431,25 +1024,29 @@ def logs(follow, lines):
 
     if follow:
         click.secho(f"Following {LOG_FILE} (Ctrl+C to stop)...\n", fg=CYAN)
+        # Nothing is left for Python to do while following, so hand the
+        # terminal over to tail(1): it waits on inotify instead of polling
+        # and Ctrl+C goes straight to it. -F keeps following across the
+        # truncation that _follow_file handles. Without tail on PATH (some
+        # containers, Windows) go straight to the Python follower.
+        tail_bin = shutil.which("tail")
+        if tail_bin:
+            sys.stdout.flush()
+            try:
+                os.execv(tail_bin, ["tail", "-F", "-n", str(lines), LOG_FILE])
+            except OSError:
+                pass
+
+    tail, offset = _tail_file(LOG_FILE, lines)
+
+    if follow:
+        click.echo(tail, nl=False)
         try:
-            proc = subprocess.run(
-                ["tail", "-f", "-n", str(lines), LOG_FILE],
-            )
+            _follow_file(LOG_FILE, offset)
         except KeyboardInterrupt:
             click.echo("\n")
     else:
-        try:
-            result = subprocess.run(
-                ["tail", "-n", str(lines), LOG_FILE],
-                capture_output=True, text=True,
-            )
-            click.echo(result.stdout)
-        except FileNotFoundError:
-            # tail not available, read manually
-            with open(LOG_FILE, "r") as f:
-                all_lines = f.readlines()
-                for line in all_lines[-lines:]:
-                    click.echo(line, nl=False)
+        click.echo(tail)
 
 
 @cli.command()
@@ -457,8 +1054,7 @@ def tui():
     """Launch the TUI (terminal) interface."""
     click.secho("🖥️  Starting FemtoBot TUI...", fg=CYAN)
 
-    os.chdir(CONFIG_DIR)
-    sys.path.insert(0, PROJECT_ROOT)
+    _enter_config_dir()
 
     from src.tui import FemtoBotApp
     app = FemtoBotApp()
@@ -476,19 +1072,18 @@ def config():
 
     click.secho("=== FemtoBot Configuration ===\n", fg=CYAN, bold=True)
 
+    # Piped or redirected output gets no colors anyway, so let the kernel
+    # copy the file straight to stdout
+    if not sys.stdout.isatty() and _sendfile_to_stdout(config_path):
+        return
+
     with open(config_path, "r") as f:
         content = f.read()
 
-    # Colorize YAML output
-    for line in content.splitlines():
-        if line.strip().startswith("#"):
-            click.secho(line, fg="bright_black")
-        elif ":" in line and not line.strip().startswith("-"):
-            key, _, value = line.partition(":")
-            click.secho(key + ":", fg=CYAN, nl=False)
-            click.echo(value)
-        else:
-            click.echo(line)
+    # Colorize YAML output in one pass and write it all at once
+    if content.endswith("\n"):
+        content = content[:-1]
+    click.echo(_colorize_yaml(content))
 
 
 # ─── SETUP ────────────────────────────────────────────────────────────
@@ -496,7 +1091,7 @@ def config():
 @cli.command()
 def setup():
     """Download required Ollama models from config.yaml."""
-    import yaml
+    yaml = _yaml()
 
     # Check Python version
     v = sys.version_info
@@ -510,8 +1105,8 @@ def setup():
 
     # Ensure config directory exists
     from src.constants import CONFIG_DIR, DATA_DIR
-    os.makedirs(CONFIG_DIR, exist_ok=True)
-    os.makedirs(DATA_DIR, exist_ok=True)
+    _makedirs(CONFIG_DIR)
+    _makedirs(DATA_DIR)
 
     config_path = os.path.join(CONFIG_DIR, "config.yaml")
 
@@ -562,9 +1157,8 @@ def setup():
         except Exception as e:
             click.secho(f"  ✗ Failed to create .env: {e}", fg=RED)
 
-    # Reload config now that it exists
-    with open(config_path, "r") as f:
-        cfg = yaml.safe_load(f) or {}
+    # Load config now that it exists
+    cfg = _load_config() or {}
 
     # Ensure default data files exist
     try:
@@ -572,7 +1166,7 @@ def setup():
         instr_file = cfg.get("INSTRUCTIONS_FILE", "data/instructions.md")
         instr_path = os.path.join(CONFIG_DIR, instr_file)
         # Ensure parent dir exists for instructions (e.g. data/)
-        os.makedirs(os.path.dirname(instr_path), exist_ok=True)
+        _makedirs(os.path.dirname(instr_path))
         
         if not os.path.exists(instr_path):
             click.secho(f"  Creating default instructions at {instr_file}...", fg=CYAN)
@@ -597,7 +1191,7 @@ def setup():
         # Events
         events_file = cfg.get("EVENTS_FILE", "data/events.txt")
         events_path = os.path.join(CONFIG_DIR, events_file)
-        os.makedirs(os.path.dirname(events_path), exist_ok=True)
+        _makedirs(os.path.dirname(events_path))
         
         if not os.path.exists(events_path):
             with open(events_path, "w", encoding="utf-8") as f:
@@ -608,7 +1202,7 @@ def setup():
         memory_file = cfg.get("MEMORY_FILE", "data/memory.md")
         if memory_file:
             memory_path = os.path.join(CONFIG_DIR, memory_file)
-            os.makedirs(os.path.dirname(memory_path), exist_ok=True)
+            _makedirs(os.path.dirname(memory_path))
             if not os.path.exists(memory_path):
                 with open(memory_path, "w", encoding="utf-8") as f:
                     f.write("# Memory Store\n")
@@ -636,36 +1230,55 @@ def setup():
         # Continue to setup models even if none found? No, return.
         return
 
-    # Check Ollama
-    if not _check_ollama():
+    # Check Ollama and get already-downloaded models in one request
+    reachable, existing, _ = _get_ollama_tags()
+    if not reachable:
         click.secho("✗ Ollama is not running.", fg=RED)
         click.secho("  Please start Ollama (e.g. 'ollama serve') and RUN 'femtobot setup' AGAIN to download models.", fg=YELLOW)
         return
 
-    # Get already-downloaded models
-    try:
-        import httpx
-        r = httpx.get("http://localhost:11434/api/tags", timeout=5)
-        existing = {m["name"] for m in r.json().get("models", [])}
-    except Exception:
-        existing = set()
-
     click.secho("=== FemtoBot Setup ===\n", fg=CYAN, bold=True)
     click.secho(f"Configuration directory: {CONFIG_DIR}", fg=CYAN)
 
+    ollama_bin = shutil.which("ollama")
+
+    missing = []
     for key, model_name in models:
         if model_name in existing:
             click.secho(f"  ✓ {key}: {model_name} (already downloaded)", fg=GREEN)
-        else:
+        elif model_name not in missing:
             click.secho(f"  ⬇ {key}: {model_name} — pulling...", fg=CYAN)
-            result = subprocess.run(
-                ["ollama", "pull", model_name],
-                capture_output=False,
-            )
-            if result.returncode == 0:
-                click.secho(f"  ✓ {model_name} downloaded", fg=GREEN)
-            else:
-                click.secho(f"  ✗ Failed to pull {model_name}", fg=RED)
+            missing.append(model_name)
+
+    def _report_pull(model_name, returncode):
+        if returncode == 0:
+            click.secho(f"  ✓ {model_name} downloaded", fg=GREEN)
+        else:
+            click.secho(f"  ✗ Failed to pull {model_name}", fg=RED)
+
+    if missing and not ollama_bin:
+        click.secho("  ✗ 'ollama' command not found in PATH; pull the models above manually.", fg=RED)
+        missing = []
+
+    if len(missing) == 1:
+        # Single model: let ollama draw its own progress bar
+        result = subprocess.run([ollama_bin, "pull", missing[0]], capture_output=False)
+        _report_pull(missing[0], result.returncode)
+    elif missing:
+        # Pulls are network-bound and independent, so overlap them. Three at
+        # a time keeps Ollama's blob writes from thrashing the disk. Their
+        # progress bars would interleave, and only the exit code is used, so
+        # the output is discarded rather than buffered in memory.
+        from concurrent.futures import ThreadPoolExecutor, as_completed
+
+        quiet = {"stdout": subprocess.DEVNULL, "stderr": subprocess.DEVNULL}
+        with ThreadPoolExecutor(max_workers=min(3, len(missing))) as pool:
+            futures = {
+                pool.submit(subprocess.run, [ollama_bin, "pull", m], **quiet): m
+                for m in missing
+            }
+            for future in as_completed(futures):
+                _report_pull(futures[future], future.result().returncode)
 
     click.echo()
     click.secho("✓ Setup complete!", fg=GREEN)
@@ -675,59 +1288,48 @@ def setup():
 # ─── UPDATE ───────────────────────────────────────────────────────────
 
 @cli.command()
-def update():
+@click.pass_context
+def update(ctx):
     """Update FemtoBot (git pull OR install latest release)."""
     click.secho("=== FemtoBot Update ===\n", fg=CYAN, bold=True)
 
     git_dir = os.path.join(PROJECT_ROOT, ".git")
-    python = _get_python()
+    python = ctx.obj["python"]
 
     if os.path.isdir(git_dir):
         # --- GIT UPDATE STRATEGY ---
         click.secho("  Pulling latest changes (git)...", fg=CYAN)
-        result = subprocess.run(
-            ["git", "pull"],
-            cwd=PROJECT_ROOT,
-            capture_output=True, text=True,
-        )
-        if result.returncode == 0:
-            output = result.stdout.strip()
+        returncode, output = _run_streaming(["git", "pull"], cwd=PROJECT_ROOT)
+        if returncode == 0:
             if "Already up to date" in output:
                 click.secho("  ✓ Already up to date", fg=GREEN)
             else:
-                click.secho(f"  ✓ Updated:\n{output}", fg=GREEN)
+                click.secho("  ✓ Updated", fg=GREEN)
         else:
-            click.secho(f"  ✗ Git pull failed: {result.stderr.strip()}", fg=RED)
+            click.secho("  ✗ Git pull failed (see output above)", fg=RED)
             return
 
-        # Install deps
+        # Install deps and re-install the package (editable) with a single
+        # pip run, so the resolver only walks the dependency graph once
         click.secho("  Installing dependencies...", fg=CYAN)
-        result = subprocess.run(
-            [python, "-m", "pip", "install", "-r", "requirements.txt", "--quiet"],
+        returncode, _ = _run_streaming(
+            [python, "-m", "pip", "install",
+             "--disable-pip-version-check", "--no-input",
+             "-r", "requirements.txt", "-e", "."],
             cwd=PROJECT_ROOT,
-            capture_output=True, text=True,
         )
-        if result.returncode == 0:
+        if returncode == 0:
             click.secho("  ✓ Dependencies updated", fg=GREEN)
+            click.secho("  ✓ CLI re-installed", fg=GREEN)
         else:
-            click.secho(f"  ✗ pip install failed: {result.stderr.strip()}", fg=RED)
+            click.secho("  ✗ pip install failed (see output above)", fg=RED)
             return
 
-        # Re-install package editable
-        result = subprocess.run(
-            [python, "-m", "pip", "install", "-e", ".", "--quiet"],
-            cwd=PROJECT_ROOT,
-            capture_output=True, text=True,
-        )
-        if result.returncode == 0:
-            click.secho("  ✓ CLI re-installed", fg=GREEN)
-
     else:
         # --- GITHUB RELEASE STRATEGY ---
         click.secho("  Git not found. Checking latest release on GitHub...", fg=CYAN)
         try:
-            import httpx
-            resp = httpx.get("https://api.github.com/repos/rocopolas/FemtoBot/releases/latest", timeout=10.0)
+            resp = _httpx().get("https://api.github.com/repos/rocopolas/FemtoBot/releases/latest", timeout=10.0)
             
             if resp.status_code == 404:
                 click.secho("  ✗ No releases found on GitHub repo.", fg=RED)
@@ -758,18 +1360,12 @@ def update():
             install_cmd = [python, "-m", "pip", "install", "--upgrade", whl_url]
             
             # Show output for transparency
-            proc = subprocess.Popen(
-                install_cmd,
-                stdout=subprocess.PIPE,
-                stderr=subprocess.PIPE,
-                text=True
-            )
-            stdout, stderr = proc.communicate()
+            returncode, _ = _run_streaming(install_cmd)
             
-            if proc.returncode == 0:
+            if returncode == 0:
                 click.secho(f"  ✓ Successfully upgraded to {tag_name}", fg=GREEN)
             else:
-                click.secho(f"  ✗ Upgrade failed:\n{stderr}", fg=RED)
+                click.secho("  ✗ Upgrade failed (see output above)", fg=RED)
                 return
 
         except ImportError:
@@ -799,66 +1395,93 @@ def memory():
               help="Collection to search")
 def memory_search(query, limit, collection_type):
     """Search the vector memory for a query."""
-    import asyncio
-
-    sys.path.insert(0, PROJECT_ROOT)
-
     click.secho(f"🔍 Searching '{query}' in {collection_type}...\n", fg=CYAN)
 
-    async def _search():
-        from utils.config_loader import get_all_config
-        from src.client import OllamaClient
-        from src.memory.vector_store import VectorManager
-
-        vm = VectorManager(get_all_config(), OllamaClient())
+    db_path = os.path.join(DATA_DIR, "chroma_db")
+    if not os.path.exists(db_path):
+        click.secho("No vector database found yet.", fg=YELLOW)
+        return
 
-        # Use raw ChromaDB query for broader results (ignore threshold)
-        query_embedding = await vm._get_embedding(query)
-        if not query_embedding:
+    # A search only needs one embedding and one collection, so skip
+    # VectorManager (which opens or creates both collections and an async
+    # Ollama client) and talk to Ollama and Chroma directly.
+    from utils.config_loader import get_all_config
+    model = get_all_config().get("RAG", {}).get("EMBEDDING_MODEL", "nomic-embed-text")
+    try:
+        # Same endpoint choice as OllamaClient.generate_embeddings: /api/embed,
+        # or /api/embeddings on Ollama releases that predate it. The stored
+        # vectors may come from either; cosine search ignores the
+        # normalisation that /api/embed adds.
+        client = _ollama_client()
+        r = client.post(
+            "/api/embed", json={"model": model, "input": [query]}, timeout=30.0
+        )
+        error = _ollama_error(r)
+        if r.status_code == 404 and error is None:
+            r = client.post(
+                "/api/embeddings", json={"model": model, "prompt": query}, timeout=30.0
+            )
+            error = _ollama_error(r)
+            query_embedding = r.json().get("embedding") if r.status_code == 200 else None
+        else:
+            query_embedding = r.json()["embeddings"][0] if r.status_code == 200 else None
+    except Exception:
+        error = None
+        query_embedding = None
+    if not query_embedding:
+        if error:
+            click.secho(f"✗ Failed to generate embedding: {error}", fg=RED)
+        else:
             click.secho("✗ Failed to generate embedding (is Ollama running?)", fg=RED)
-            return
+        return
 
-        collection = vm.memory_collection if collection_type == "memory" else vm.documents_collection
-        results = collection.query(
-            query_embeddings=[query_embedding],
-            n_results=limit,
-        )
+    from chromadb.config import Settings
+    chroma = _chromadb().PersistentClient(
+        path=db_path, settings=Settings(anonymized_telemetry=False)
+    )
+    try:
+        collection = chroma.get_collection(collection_type)
+    except Exception:
+        click.secho(f"No {collection_type} collection yet.", fg=YELLOW)
+        return
 
-        if not results["documents"] or not results["documents"][0]:
-            click.secho("No results found.", fg=YELLOW)
-            return
+    # Use raw ChromaDB query for broader results (ignore threshold)
+    results = collection.query(
+        query_embeddings=[query_embedding],
+        n_results=limit,
+    )
 
-        for i, doc in enumerate(results["documents"][0]):
-            distance = results["distances"][0][i] if results["distances"] else 0
-            similarity = 1 - distance
-            # Color based on similarity
-            if similarity >= 0.6:
-                color = GREEN
-            elif similarity >= 0.4:
-                color = YELLOW
-            else:
-                color = RED
+    if not results["documents"] or not results["documents"][0]:
+        click.secho("No results found.", fg=YELLOW)
+        return
 
-            click.secho(f"  [{i+1}] ", fg=CYAN, nl=False)
-            click.secho(f"({similarity:.1%}) ", fg=color, nl=False)
-            # Truncate long docs
-            preview = doc[:120].replace("\n", " ")
-            if len(doc) > 120:
-                preview += "..."
-            click.echo(preview)
+    for i, doc in enumerate(results["documents"][0]):
+        distance = results["distances"][0][i] if results["distances"] else 0
+        similarity = 1 - distance
+        # Color based on similarity
+        if similarity >= 0.6:
+            color = GREEN
+        elif similarity >= 0.4:
+            color = YELLOW
+        else:
+            color = RED
 
-    asyncio.run(_search())
+        click.secho(f"  [{i+1}] ", fg=CYAN, nl=False)
+        click.secho(f"({similarity:.1%}) ", fg=color, nl=False)
+        # Truncate long docs
+        preview = doc[:120].replace("\n", " ")
+        if len(doc) > 120:
+            preview += "..."
+        click.echo(preview)
 
 
 @memory.command("status")
 def memory_status():
     """Show vector memory statistics."""
-    sys.path.insert(0, PROJECT_ROOT)
-
     click.secho("=== Memory Status ===\n", fg=CYAN, bold=True)
 
     try:
-        import chromadb
+        chromadb = _chromadb()
         from src.constants import DATA_DIR
 
         db_path = os.path.join(DATA_DIR, "chroma_db")
@@ -886,15 +1509,9 @@ def memory_status():
             click.echo("  📄 Documents: (collection not created)")
 
         # DB size on disk
-        total_size = 0
-        for dirpath, _, filenames in os.walk(db_path):
-            for f in filenames:
-                total_size += os.path.getsize(os.path.join(dirpath, f))
+        total_size = _dir_size(db_path)
 
-        if total_size > 1024 * 1024:
-            click.echo(f"  💾 DB size:   {total_size / 1024 / 1024:.1f} MB")
-        else:
-            click.echo(f"  💾 DB size:   {total_size / 1024:.1f} KB")
+        click.echo(f"  💾 DB size:   {_human_bytes(total_size)}")
 
         click.echo(f"  📂 Path:      {db_path}")
 
@@ -925,20 +1542,56 @@ def backup(output):
 
     click.secho(f"📦 Creating backup...", fg=CYAN)
 
-    with tarfile.open(backup_path, "w:gz") as tar:
-        tar.add(data_dir, arcname="data")
+    def _skip_bytecode(tarinfo):
+        name = os.path.basename(tarinfo.name)
+        if name == "__pycache__" or name.endswith(".pyc"):
+            return None
+        return tarinfo
+
+    def _add_members(tar):
+        tar.add(data_dir, arcname="data", filter=_skip_bytecode)
         if os.path.exists(config_file):
             tar.add(config_file, arcname="config.yaml")
         if os.path.exists(env_file):
             tar.add(env_file, arcname=".env")
 
-    size = os.path.getsize(backup_path)
-    if size > 1024 * 1024:
-        size_str = f"{size / 1024 / 1024:.1f} MB"
-    else:
-        size_str = f"{size / 1024:.1f} KB"
+    # pigz compresses on all cores and still writes plain gzip, so `restore`
+    # can read the result. Otherwise fall back to fast single-threaded gzip.
+    pigz = shutil.which("pigz")
+    error = None
+    try:
+        with open(backup_path, "wb") as out:
+            if pigz:
+                proc = subprocess.Popen([pigz, "-q"], stdin=subprocess.PIPE, stdout=out)
+                try:
+                    with tarfile.open(fileobj=proc.stdin, mode="w|", bufsize=TAR_BUFSIZE,
+                                      copybufsize=TAR_BUFSIZE, format=tarfile.PAX_FORMAT) as tar:
+                        _add_members(tar)
+                finally:
+                    # Even if tar.add() failed, let pigz see EOF and exit
+                    with contextlib.suppress(BrokenPipeError):
+                        proc.stdin.close()
+                    returncode = proc.wait()
+                if returncode != 0:
+                    error = "pigz exited with an error"
+                # pigz wrote through its own descriptor; ask the kernel for the size
+                size = os.fstat(out.fileno()).st_size
+            else:
+                with tarfile.open(fileobj=out, mode="w:gz", compresslevel=1,
+                                  copybufsize=TAR_BUFSIZE, format=tarfile.PAX_FORMAT) as tar:
+                    _add_members(tar)
+                size = out.tell()
+    except (OSError, tarfile.TarError) as e:
+        error = str(e)
+
+    if error:
+        # Don't leave a truncated archive that looks like a usable backup
+        with contextlib.suppress(FileNotFoundError):
+            os.unlink(backup_path)
+        click.secho(f"✗ Backup failed: {error}", fg=RED)
+        sys.exit(1)
 
-    click.secho(f"✓ Backup created: {backup_path} ({size_str})", fg=GREEN)
+    click.secho(f"✓ Backup created: {backup_path} ({_human_bytes(size)})", fg=GREEN)
 
 
 @cli.command()
@@ -960,9 +1613,46 @@ def restore(backup_file, force):
 
     click.secho(f"📦 Restoring from {backup_file}...", fg=CYAN)
 
-    with tarfile.open(backup_file, "r:gz") as tar:
-        tar.extractall(path=CONFIG_DIR)
+    # Stream the archive in one pass and only extract members that stay
+    # inside CONFIG_DIR. The "data" filter strips setuid bits and raises a
+    # FilterError for devices and links pointing outside the destination;
+    # those members are skipped so the rest of the archive still restores.
+    skipped = []
 
+    def _extract_members(tar):
+        for member in tar:
+            if not _safe_member(member, CONFIG_DIR):
+                skipped.append(member.name)
+                continue
+            try:
+                tar.extract(member, path=CONFIG_DIR, filter="data")
+            except tarfile.FilterError:
+                skipped.append(member.name)
+
+    # Same as `backup`: let pigz inflate in its own process when available
+    pigz = shutil.which("pigz")
+    if pigz:
+        proc = subprocess.Popen([pigz, "-dc", backup_file], stdout=subprocess.PIPE)
+        try:
+            with tarfile.open(fileobj=proc.stdout, mode="r|", bufsize=TAR_BUFSIZE,
+                              copybufsize=TAR_BUFSIZE) as tar:
+                _extract_members(tar)
+            # Drain the padding after the end-of-archive marker so pigz
+            # doesn't die on a closed pipe
+            proc.stdout.read()
+        finally:
+            proc.stdout.close()
+            returncode = proc.wait()
+        if returncode != 0:
+            click.secho("✗ Restore failed: pigz exited with an error", fg=RED)
+            return
+    else:
+        with tarfile.open(backup_file, "r|gz", bufsize=TAR_BUFSIZE,
+                          copybufsize=TAR_BUFSIZE) as tar:
+            _extract_members(tar)
+
+    if skipped:
+        click.secho(f"⚠ Skipped {len(skipped)} unsafe path(s): {skipped}", fg=YELLOW)
     click.secho("✓ Restore complete!", fg=GREEN)
     click.echo("  Restart FemtoBot to apply changes: femtobot restart")
 
@@ -972,8 +1662,6 @@ def restore(backup_file, force):
 @cli.command()
 def doctor():
     """Run diagnostic checks on FemtoBot."""
-    import yaml
-
     click.secho("=== FemtoBot Doctor ===\n", fg=CYAN, bold=True)
     issues = 0
 
@@ -990,6 +1678,7 @@ def doctor():
             try:
                 import importlib.resources
                 import stat
+                import tempfile
                 
                 # Extract script to temp file
                 try:
@@ -1048,14 +1737,12 @@ def doctor():
             click.secho("  ⚠ Not running in a virtual environment (recommended)", fg=YELLOW)
 
     # 3. Config files
-    config_path = os.path.join(CONFIG_DIR, "config.yaml")
     env_path = os.path.join(CONFIG_DIR, ".env")
 
     # 3.1 config.yaml
-    if os.path.exists(config_path):
+    cfg = _load_config()
+    if cfg is not None:
         click.secho("  ✓ config.yaml found", fg=GREEN)
-        with open(config_path, "r") as f:
-            cfg = yaml.safe_load(f) or {}
     else:
         click.secho("  ✗ config.yaml missing", fg=RED)
         issues += 1
@@ -1092,7 +1779,8 @@ def doctor():
 
     # 4. Data directory
     data_dir = DATA_DIR
-    if os.path.exists(data_dir) and os.access(data_dir, os.W_OK):
+    # access() also fails for a missing path, so no separate exists() probe
+    if os.access(data_dir, os.W_OK):
         click.secho(f"  ✓ data/ writable ({data_dir})", fg=GREEN)
     else:
         click.secho(f"  ✗ data/ missing or not writable ({data_dir})", fg=RED)
@@ -1100,7 +1788,12 @@ def doctor():
 
     # 5. Environment variables (This section is now redundant due to .env check above, removing it)
     # 6. Ollama
-    if _check_ollama():
+    reachable, existing, _ = _get_ollama_tags()
+    if reachable and not existing:
+        click.secho("\n  ✓ Ollama running", fg=GREEN)
+        click.secho("  ⚠ Ollama has no models; run 'femtobot setup'", fg=YELLOW)
+        issues += 1
+    elif reachable:
         click.secho("\n  ✓ Ollama running", fg=GREEN)
         
         # Check models
@@ -1112,25 +1805,14 @@ def doctor():
             ("EMBEDDING", cfg.get("RAG", {}).get("EMBEDDING_MODEL"))
         ]
         
-        available_models = []
-        try:
-            import httpx
-            resp = httpx.get("http://localhost:11434/api/tags", timeout=2.0)
-            if resp.status_code == 200:
-                data = resp.json()
-                available_models = [m["name"] for m in data.get("models", [])]
-        except:
-             pass
-            
         for name, model_name in models:
             if not model_name: continue
             
-            # Simple check if model string is in available tags
-            found = False
-            for avail in available_models:
-                if model_name in avail:
-                    found = True
-                    break
+            # Exact tag, or a tag-less name matching any tag of that model
+            # ("nomic-embed-text" is listed as "nomic-embed-text:latest")
+            found = model_name in existing or any(
+                avail.split(":")[0] == model_name for avail in existing
+            )
             
             if found:
                 click.secho(f"  ✓ {name}: {model_name} found", fg=GREEN)
@@ -1143,18 +1825,19 @@ def doctor():
 
     # 7. FFmpeg
     click.echo()
-    try:
-        subprocess.run(["ffmpeg", "-version"], capture_output=True, check=True)
-        click.secho("  ✓ FFmpeg installed", fg=GREEN)
-    except (FileNotFoundError, subprocess.CalledProcessError):
+    ffmpeg_path = shutil.which("ffmpeg")
+    if ffmpeg_path:
+        click.secho(f"  ✓ FFmpeg installed ({ffmpeg_path})", fg=GREEN)
+    else:
         click.secho("  ✗ FFmpeg not found (needed for audio)", fg=RED)
         issues += 1
 
-    # 8. ChromaDB
+    # 8. ChromaDB: the version comes from the installed package metadata,
+    # so the check doesn't import chromadb (and numpy, onnxruntime, ...)
+    from importlib import metadata
     try:
-        import chromadb
-        click.secho(f"  ✓ ChromaDB {chromadb.__version__}", fg=GREEN)
-    except ImportError:
+        click.secho(f"  ✓ ChromaDB {metadata.version('chromadb')}", fg=GREEN)
+    except metadata.PackageNotFoundError:
         click.secho("  ✗ ChromaDB not installed", fg=RED)
         issues += 1
 
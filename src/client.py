@@ -1,8 +1,16 @@
 """Ollama API client for FemtoBot with streaming support."""
+import hashlib
 import httpx
 import json
 import logging
-from typing import AsyncGenerator, Dict, List, Any, Optional
+from collections import OrderedDict
+from typing import AsyncGenerator, AsyncIterator, Dict, List, Any, Optional
+
+try:
+    # Several times faster on the small per-token chunks of a chat stream
+    from orjson import loads as _json_loads
+except ImportError:
+    _json_loads = json.loads
 
 logger = logging.getLogger(__name__)
 
@@ -10,6 +18,47 @@ logger = logging.getLogger(__name__)
 Message = Dict[str, Any]
 Messages = List[Message]
 
+# Characters of an error response body included in the error message
+MAX_ERROR_DETAIL = 8192
+# Embeddings kept in the in-process LRU cache of OllamaClient
+EMBEDDING_CACHE_SIZE = 4096
+
+
+def _ollama_error(response: httpx.Response) -> Optional[str]:
+    """
+    Return the message of Ollama's JSON {"error": ...} body, if any.
+    
+    Tells the 404s apart: an unknown model comes with such a body, while
+    an Ollama too old to have an endpoint answers "404 page not found".
+    """
+    try:
+        body = response.json()
+    except ValueError:
+        return None
+    return body.get("error") if isinstance(body, dict) else None
+
+
+async def _iter_ndjson(chunks: AsyncIterator[bytes]) -> AsyncGenerator[bytes, None]:
+    """
+    Split a byte stream into newline-delimited records.
+    
+    Works on raw bytes so each line skips the str decode that
+    aiter_lines() does before the JSON parser decodes it again.
+    Empty lines are dropped.
+    """
+    buf = bytearray()
+    async for chunk in chunks:
+        buf += chunk
+        start = 0
+        while (nl := buf.find(b"\n", start)) != -1:
+            if nl > start:
+                yield bytes(buf[start:nl])
+            start = nl + 1
+        # Trim consumed lines once per chunk, not once per line
+        del buf[:start]
+    if buf.strip():
+        yield bytes(buf)
+
 
 class OllamaClient:
     """
@@ -20,6 +69,8 @@ class OllamaClient:
     """
     
     _shared_client: Optional[httpx.AsyncClient] = None
+    # (model, text) digest -> embedding, oldest first; shared by all instances
+    _embedding_cache: "OrderedDict[bytes, List[float]]" = OrderedDict()
     
     def __init__(self, base_url: str = "http://localhost:11434") -> None:
         """
@@ -38,6 +89,13 @@ class OllamaClient:
             cls._shared_client = httpx.AsyncClient(timeout=None)
         return cls._shared_client
 
+    @classmethod
+    async def aclose(cls) -> None:
+        """Close the shared httpx client and its pooled connections."""
+        if cls._shared_client is not None:
+            await cls._shared_client.aclose()
+            cls._shared_client = None
+
     async def stream_chat(
         self, 
         model: str, 
@@ -78,12 +136,19 @@ class OllamaClient:
                 timeout=None
             ) as response:
                 if response.status_code != 200:
-                    error_detail = ""
+                    # Keep only the start of the body; the gist of an
+                    # Ollama error is in its first few lines
+                    parts = []
+                    size = 0
                     try:
                         async for chunk in response.aiter_text():
-                            error_detail += chunk
+                            parts.append(chunk)
+                            size += len(chunk)
+                            if size >= MAX_ERROR_DETAIL:
+                                break
                     except Exception:
                         pass
+                    error_detail = "".join(parts)[:MAX_ERROR_DETAIL]
                     error_msg = (
                         f"Error: Ollama returned status {response.status_code}. "
                         f"Details: {error_detail}"
@@ -92,11 +157,9 @@ class OllamaClient:
                     yield error_msg
                     return
 
-                async for line in response.aiter_lines():
-                    if not line:
-                        continue
+                async for line in _iter_ndjson(response.aiter_bytes()):
                     try:
-                        data = json.loads(line)
+                        data = _json_loads(line)
                         if "message" in data:
                             content = data["message"].get("content", "")
                             if content:
@@ -218,23 +281,92 @@ class OllamaClient:
         Returns:
             List of floats representing the embedding
         """
-        url = f"{self.base_url}/api/embeddings"
+        return (await self.generate_embeddings(model, [text]))[0]
+
+    async def generate_embeddings(
+        self, 
+        model: str, 
+        texts: List[str]
+    ) -> List[List[float]]:
+        """
+        Generate embeddings for several texts in a single request.
+        
+        Uses Ollama's /api/embed endpoint, which embeds a list of inputs
+        in one pass instead of one round trip per text. Successful results
+        are cached per (model, text), so repeated prompts (RAG queries,
+        re-ingested chunks) are not sent again.
+        
+        Args:
+            model: Name of the embedding model
+            texts: Texts to embed
+            
+        Returns:
+            One embedding per text, in order (an empty list where it failed)
+        """
+        cache = self._embedding_cache
+        keys = [
+            hashlib.blake2b(f"{model}\0{text}".encode(), digest_size=16).digest()
+            for text in texts
+        ]
+        embeddings = []
+        missing = []
+        for i, key in enumerate(keys):
+            embedding = cache.get(key)
+            if embedding is None:
+                missing.append(i)
+                embedding = []
+            else:
+                cache.move_to_end(key)
+            embeddings.append(embedding)
+        if not missing:
+            return embeddings
+        
+        url = f"{self.base_url}/api/embed"
         payload = {
             "model": model,
-            "prompt": text
+            "input": [texts[i] for i in missing]
         }
         
         try:
             client = self._get_client()
             response = await client.post(url, json=payload, timeout=30.0)
             if response.status_code == 200:
-                data = response.json()
-                embedding = data.get("embedding", [])
-                return embedding
+                fetched = response.json().get("embeddings", [])
+            elif response.status_code == 404 and _ollama_error(response) is None:
+                # Ollama releases before /api/embed only have the
+                # one-text-per-request /api/embeddings endpoint
+                fetched = [
+                    await self._legacy_embedding(client, model, texts[i])
+                    for i in missing
+                ]
             else:
                 logger.error(f"Embedding error {response.status_code}: {response.text}")
-                return []
+                fetched = []
+            for i, embedding in zip(missing, fetched):
+                if embedding:
+                    embeddings[i] = embedding
+                    cache[keys[i]] = embedding
+            while len(cache) > EMBEDDING_CACHE_SIZE:
+                cache.popitem(last=False)
                     
         except Exception as e:
             logger.error(f"Error generating embedding: {e}")
-            return []
+        return embeddings
+
+    async def _legacy_embedding(
+        self, 
+        client: httpx.AsyncClient, 
+        model: str, 
+        text: str
+    ) -> List[float]:
+        """Embed one text through the older /api/embeddings endpoint."""
+        url = f"{self.base_url}/api/embeddings"
+        payload = {
+            "model": model,
+            "prompt": text
+        }
+        response = await client.post(url, json=payload, timeout=30.0)
+        if response.status_code == 200:
+            return response.json().get("embedding", [])
+        logger.error(f"Embedding error {response.status_code}: {response.text}")
+        return []
@@ -295,13 +295,17 @@ async def error_handler(update: object, context: ContextTypes.DEFAULT_TYPE) -> N
         except Exception:
             pass
 
+async def close_http_client(application) -> None:
+    """Close the shared Ollama connection pool once polling has stopped."""
+    await OllamaClient.aclose()
+
 def main():
     """Main entry point."""
     kill_existing_bot()
     write_pid()
     load_instructions()
     
-    application = ApplicationBuilder().token(TOKEN).build()
+    application = ApplicationBuilder().token(TOKEN).post_shutdown(close_http_client).build()
     application.add_error_handler(error_handler)
     
     # Command handlers
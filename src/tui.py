@@ -191,6 +191,7 @@ class FemtoBotApp(App):
             await self.client.unload_model(self.model)
         if self.vision_model:
             await self.client.unload_model(self.vision_model)
+        await OllamaClient.aclose()
         
         logger.info("FemtoBot TUI shutdown complete")
 
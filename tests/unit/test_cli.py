@@ -0,0 +1,528 @@
+"""Unit tests for cli module helpers."""
+import contextlib
+import json
+import os
+import shutil
+import signal
+import socket
+import subprocess
+import sys
+import tarfile
+import time
+
+import click
+import pytest
+from click.testing import CliRunner
+
+import src.cli as cli_module
+
+from src.cli import (
+    _colorize_yaml,
+    _dir_size,
+    _find_bot_pids,
+    _human_bytes,
+    _is_bot_process,
+    _process_uptime,
+    _run_streaming,
+    _safe_member,
+    _tail_file,
+    _wait_for_exits,
+)
+
+
+class TestTailFile:
+    """Test suite for the in-process log tail reader."""
+
+    def test_tail_last_lines(self, tmp_path):
+        """Test that only the requested trailing lines are returned."""
+        log = tmp_path / "bot.log"
+        log.write_text("".join(f"line {i}\n" for i in range(100)))
+
+        tail, offset = _tail_file(str(log), 3)
+
+        assert tail == "line 97\nline 98\nline 99\n"
+        assert offset == log.stat().st_size
+
+    def test_tail_spans_multiple_blocks(self, tmp_path):
+        """Test reading backwards across several small blocks."""
+        log = tmp_path / "bot.log"
+        log.write_text("".join(f"line {i}\n" for i in range(50)))
+
+        tail, _ = _tail_file(str(log), 10, block_size=16)
+
+        assert tail.splitlines() == [f"line {i}" for i in range(40, 50)]
+
+    def test_tail_more_lines_than_file(self, tmp_path):
+        """Test asking for more lines than the file contains."""
+        log = tmp_path / "bot.log"
+        log.write_text("first\nsecond")
+
+        tail, _ = _tail_file(str(log), 50)
+
+        assert tail == "first\nsecond"
+
+    def test_tail_empty_file(self, tmp_path):
+        """Test tailing an empty file."""
+        log = tmp_path / "bot.log"
+        log.write_text("")
+
+        assert _tail_file(str(log), 5) == ("", 0)
+
+
+class TestDirSize:
+    """Test suite for directory size calculation."""
+
+    def test_dir_size_nested(self, tmp_path):
+        """Test that files in nested directories are counted."""
+        (tmp_path / "a.bin").write_bytes(b"x" * 10)
+        nested = tmp_path / "sub" / "deeper"
+        nested.mkdir(parents=True)
+        (nested / "b.bin").write_bytes(b"y" * 25)
+        files = [tmp_path / "a.bin", nested / "b.bin"]
+
+        if hasattr(os.stat_result, "st_blocks"):
+            expected = sum(f.stat().st_blocks * 512 for f in files)
+        else:
+            expected = 35
+        assert _dir_size(str(tmp_path)) == expected
+
+    @pytest.mark.skipif(not hasattr(os.stat_result, "st_blocks"), reason="needs st_blocks")
+    def test_dir_size_sparse_file(self, tmp_path):
+        """Test that the unallocated part of a sparse file is not counted."""
+        with open(tmp_path / "sparse.bin", "wb") as f:
+            f.truncate(64 * 1024 * 1024)
+
+        assert _dir_size(str(tmp_path)) < 64 * 1024 * 1024
+
+    def test_dir_size_empty(self, tmp_path):
+        """Test an empty directory."""
+        assert _dir_size(str(tmp_path)) == 0
+
+
+class TestHumanBytes:
+    """Test suite for byte-size formatting."""
+
+    def test_kilobytes(self):
+        """Test sizes below one megabyte."""
+        assert _human_bytes(0) == "0.0 KB"
+        assert _human_bytes(1536) == "1.5 KB"
+
+    def test_megabytes(self):
+        """Test sizes of one megabyte and above."""
+        assert _human_bytes(1024 * 1024) == "1.0 MB"
+        assert _human_bytes(5 * 1024 * 1024 + 512 * 1024) == "5.5 MB"
+
+
+class TestColorizeYaml:
+    """Test suite for config colorization."""
+
+    def test_text_is_preserved(self):
+        """Test that stripping the styling gives back the original text."""
+        content = "# comment: x\nMODEL: llama\nRAG:\n  - item: 1\n\nplain"
+
+        assert click.unstyle(_colorize_yaml(content)) == content
+
+    def test_keys_and_comments_styled(self):
+        """Test which lines get styled."""
+        out = _colorize_yaml("# note\nMODEL: llama\n  - item: 1").splitlines()
+
+        assert out[0] == click.style("# note", fg="bright_black")
+        assert out[1] == click.style("MODEL:", fg="cyan") + " llama"
+        assert out[2] == "  - item: 1"
+
+
+class TestSafeMember:
+    """Test suite for restore path validation."""
+
+    def test_relative_paths_allowed(self, tmp_path):
+        """Test members that stay inside the destination."""
+        assert _safe_member(tarfile.TarInfo("data/memory.md"), str(tmp_path))
+        assert _safe_member(tarfile.TarInfo("config.yaml"), str(tmp_path))
+
+    def test_traversal_rejected(self, tmp_path):
+        """Test members that would escape the destination."""
+        assert not _safe_member(tarfile.TarInfo("../evil"), str(tmp_path))
+        assert not _safe_member(tarfile.TarInfo("data/../../evil"), str(tmp_path))
+        assert not _safe_member(tarfile.TarInfo("/etc/passwd"), str(tmp_path))
+
+
+class TestBackupRestore:
+    """Test suite for the backup and restore commands."""
+
+    @pytest.fixture
+    def home(self, tmp_path, monkeypatch):
+        data = tmp_path / "data"
+        data.mkdir()
+        (data / "memory.md").write_text("remember this")
+        (tmp_path / "config.yaml").write_text("MODEL: llama\n")
+        monkeypatch.setattr(cli_module, "CONFIG_DIR", str(tmp_path))
+        monkeypatch.setattr(cli_module, "DATA_DIR", str(data))
+        return tmp_path
+
+    @pytest.mark.parametrize("compressor", [None, "gzip"])
+    def test_round_trip(self, home, monkeypatch, compressor):
+        """Test restoring a backup, in-process and through an external gzip."""
+        # gzip takes the same -q / -dc flags as pigz
+        tool = compressor and shutil.which(compressor)
+        if compressor and not tool:
+            pytest.skip(f"{compressor} not installed")
+        monkeypatch.setattr(cli_module.shutil, "which",
+                            lambda name: tool if name == "pigz" else None)
+        archive = home / "backup.tar.gz"
+        runner = CliRunner()
+
+        result = runner.invoke(cli_module.cli, ["backup", "-o", str(archive)])
+        assert result.exit_code == 0, result.output
+        (home / "data" / "memory.md").write_text("changed")
+        (home / "config.yaml").unlink()
+
+        result = runner.invoke(cli_module.cli, ["restore", "--force", str(archive)])
+
+        assert result.exit_code == 0, result.output
+        assert "Restore complete" in result.output
+        assert (home / "data" / "memory.md").read_text() == "remember this"
+        assert (home / "config.yaml").read_text() == "MODEL: llama\n"
+
+    def test_failing_pigz_removes_archive(self, home, monkeypatch):
+        """Test that a compressor failure exits non-zero and leaves no file."""
+        false = shutil.which("false")
+        if not false:
+            pytest.skip("false not installed")
+        monkeypatch.setattr(cli_module.shutil, "which",
+                            lambda name: false if name == "pigz" else None)
+        archive = home / "backup.tar.gz"
+
+        result = CliRunner().invoke(cli_module.cli, ["backup", "-o", str(archive)])
+
+        assert result.exit_code == 1
+        assert "Backup failed" in result.output
+        assert not archive.exists()
+
+    @pytest.mark.parametrize("compressor", [None, "gzip"])
+    def test_add_error_removes_archive(self, home, monkeypatch, compressor):
+        """Test that a file failing to archive exits non-zero and leaves no file."""
+        tool = compressor and shutil.which(compressor)
+        if compressor and not tool:
+            pytest.skip(f"{compressor} not installed")
+        monkeypatch.setattr(cli_module.shutil, "which",
+                            lambda name: tool if name == "pigz" else None)
+
+        def failing_add(self, *args, **kwargs):
+            raise PermissionError("denied")
+
+        monkeypatch.setattr(tarfile.TarFile, "add", failing_add)
+        archive = home / "backup.tar.gz"
+
+        result = CliRunner().invoke(cli_module.cli, ["backup", "-o", str(archive)])
+
+        assert result.exit_code == 1
+        assert "denied" in result.output
+        assert not archive.exists()
+
+    @pytest.mark.parametrize("compressor", [None, "gzip"])
+    def test_outside_symlink_skipped(self, home, monkeypatch, compressor):
+        """Test that a link escaping CONFIG_DIR is skipped, not fatal."""
+        tool = compressor and shutil.which(compressor)
+        if compressor and not tool:
+            pytest.skip(f"{compressor} not installed")
+        monkeypatch.setattr(cli_module.shutil, "which",
+                            lambda name: tool if name == "pigz" else None)
+        os.symlink("/etc/hostname", home / "data" / "outside")
+        archive = home / "backup.tar.gz"
+        runner = CliRunner()
+        assert runner.invoke(cli_module.cli, ["backup", "-o", str(archive)]).exit_code == 0
+        (home / "data" / "outside").unlink()
+        (home / "config.yaml").unlink()
+
+        result = runner.invoke(cli_module.cli, ["restore", "--force", str(archive)])
+
+        assert result.exit_code == 0, result.output
+        assert "data/outside" in result.output
+        assert not (home / "data" / "outside").is_symlink()
+        assert (home / "config.yaml").read_text() == "MODEL: llama\n"
+
+
+class TestIsBotProcess:
+    """Test suite for bot process matching."""
+
+    def test_bot_processes_match(self):
+        """Test python processes running the bot."""
+        assert _is_bot_process("python3", ["python3", "/opt/femtobot/src/telegram_bot.py"])
+        assert _is_bot_process("Python", ["/venv_bot/bin/python", "-m", "femtobot"])
+
+    def test_other_processes_ignored(self):
+        """Test processes that must not be stopped."""
+        assert not _is_bot_process("python3", ["python3", "manage.py", "runserver"])
+        assert not _is_bot_process("vim", ["vim", "telegram_bot.py"])
+        assert not _is_bot_process(None, ["telegram_bot.py"])
+        assert not _is_bot_process("python3", None)
+
+
+class TestRunStreaming:
+    """Test suite for streamed subprocess output."""
+
+    def test_output_echoed_and_tail_kept(self, capsys):
+        """Test that every line is shown but only the last ones are kept."""
+        code, tail = _run_streaming(
+            [sys.executable, "-u", "-c", "import sys; print('a'); print('b', file=sys.stderr); print('c'); sys.exit(3)"],
+            keep=2,
+        )
+
+        assert code == 3
+        assert tail == "b\nc\n"
+        assert capsys.readouterr().out.split() == ["a", "b", "c"]
+
+
+class TestFindBotPids:
+    """Test suite for the bot process scan."""
+
+    def test_finds_running_bot(self, tmp_path):
+        """Test that a python process running telegram_bot.py is found."""
+        script = tmp_path / "telegram_bot.py"
+        script.write_text("import time\ntime.sleep(30)\n")
+        proc = subprocess.Popen([sys.executable, str(script)])
+        try:
+            # The new process's cmdline can read empty for a moment after exec
+            for _ in range(40):
+                if proc.pid in _find_bot_pids():
+                    break
+                time.sleep(0.05)
+            assert proc.pid in _find_bot_pids()
+        finally:
+            proc.kill()
+            proc.wait()
+
+    def test_excludes_own_process(self):
+        """Test that the scanning process never reports itself."""
+        assert os.getpid() not in _find_bot_pids()
+
+
+class TestKillAllBotProcesses:
+    """Test suite for stopping bot processes."""
+
+    def test_stale_pid_file_not_signalled(self, tmp_path, monkeypatch):
+        """Test that a PID file naming a non-bot process only gets removed."""
+        pid_file = tmp_path / "femtobot.pid"
+        other = subprocess.Popen([sys.executable, "-c", "import time; time.sleep(30)"],
+                                 start_new_session=True)
+        try:
+            pid_file.write_text(str(other.pid))
+            monkeypatch.setattr(cli_module, "PID_FILE", str(pid_file))
+
+            killed, errors, forced = cli_module._kill_all_bot_processes(bot_pids=[])
+
+            assert (killed, errors, forced) == ([], [], [])
+            assert other.poll() is None
+            assert not pid_file.exists()
+        finally:
+            other.kill()
+            other.wait()
+
+    def test_bot_from_pid_file_stopped(self, tmp_path, monkeypatch):
+        """Test that a PID file naming the bot still stops it."""
+        script = tmp_path / "telegram_bot.py"
+        script.write_text("import time\ntime.sleep(30)\n")
+        bot = subprocess.Popen([sys.executable, str(script)], start_new_session=True)
+        try:
+            pid_file = tmp_path / "femtobot.pid"
+            pid_file.write_text(str(bot.pid))
+            monkeypatch.setattr(cli_module, "PID_FILE", str(pid_file))
+            # The new process's cmdline can read empty for a moment after exec
+            for _ in range(40):
+                if cli_module._pid_is_bot(bot.pid):
+                    break
+                time.sleep(0.05)
+
+            cli_module._kill_all_bot_processes(bot_pids=[])
+
+            assert bot.wait(timeout=5) is not None
+        finally:
+            if bot.poll() is None:
+                bot.kill()
+                bot.wait()
+
+
+class TestStopBotProcess:
+    """Test suite for choosing between group and per-process shutdown."""
+
+    @pytest.fixture
+    def bot_and_sibling(self, tmp_path, monkeypatch):
+        script = tmp_path / "telegram_bot.py"
+        script.write_text("import time\ntime.sleep(30)\n")
+        # Acts like a shell running `python telegram_bot.py | tee`: the bot
+        # leads a job group that also holds an unrelated sibling. setpgid()
+        # only works within one session, hence the launcher.
+        launcher = subprocess.Popen([sys.executable, "-c", (
+            "import subprocess, sys, time\n"
+            f"bot = subprocess.Popen([sys.executable, {str(script)!r}], process_group=0)\n"
+            "sib = subprocess.Popen([sys.executable, '-c', 'import time; time.sleep(30)'],"
+            " process_group=bot.pid)\n"
+            "print(bot.pid, sib.pid, flush=True)\n"
+            "time.sleep(30)\n"
+        )], stdout=subprocess.PIPE, text=True, start_new_session=True)
+        bot_pid, sibling_pid = map(int, launcher.stdout.readline().split())
+        monkeypatch.setattr(cli_module, "PGID_FILE", str(tmp_path / "femtobot.pgid"))
+        yield bot_pid, sibling_pid
+        os.killpg(launcher.pid, signal.SIGKILL)
+        with contextlib.suppress(ProcessLookupError):
+            os.killpg(bot_pid, signal.SIGKILL)
+        launcher.wait()
+
+    def test_unrecorded_group_leader_stopped_alone(self, bot_and_sibling):
+        """Test that a group leader without a PGID record doesn't take its group down."""
+        bot_pid, sibling_pid = bot_and_sibling
+
+        cli_module._stop_bot_process(bot_pid, cli_module._read_pgid())
+
+        assert _wait_for_exits([bot_pid], timeout=5) == []
+        # Not even a zombie: its pidfd hasn't reported an exit
+        assert _wait_for_exits([sibling_pid], timeout=0.3) == [sibling_pid]
+
+    def test_recorded_group_stopped_together(self, bot_and_sibling):
+        """Test that the group recorded by `start` is signalled as a whole."""
+        bot_pid, sibling_pid = bot_and_sibling
+        cli_module._write_int_file(cli_module.PGID_FILE, bot_pid)
+
+        cli_module._stop_bot_process(bot_pid, cli_module._read_pgid())
+
+        assert _wait_for_exits([bot_pid, sibling_pid], timeout=5) == []
+
+
+class TestWaitForExits:
+    """Test suite for waiting on several processes at once."""
+
+    def test_reports_survivors(self):
+        """Test that only processes still running after the timeout are returned."""
+        quick = subprocess.Popen([sys.executable, "-c", "pass"])
+        slow = subprocess.Popen([sys.executable, "-c", "import time; time.sleep(30)"])
+        try:
+            assert _wait_for_exits([quick.pid, slow.pid], timeout=1) == [slow.pid]
+        finally:
+            slow.kill()
+            slow.wait()
+            quick.wait()
+
+
+@pytest.mark.skipif(not sys.platform.startswith("linux"), reason="needs /proc")
+class TestProcessUptime:
+    """Test suite for /proc based process uptime."""
+
+    def test_own_process(self):
+        """Test that the current process reports a sane uptime."""
+        uptime = _process_uptime(os.getpid())
+
+        assert uptime is not None
+        assert 0 <= uptime < 24 * 3600
+
+    def test_missing_process(self):
+        """Test a PID that does not exist."""
+        assert _process_uptime(2 ** 22 + 1) is None
+
+
+class TestStatusJson:
+    """Test suite for `status --json`."""
+
+    def test_stopped_bot(self, tmp_path, monkeypatch):
+        """Test the JSON report when nothing is running."""
+        log = tmp_path / "femtobot.log"
+        log.write_bytes(b"x" * 42)
+        monkeypatch.setattr(cli_module, "PID_FILE", str(tmp_path / "femtobot.pid"))
+        monkeypatch.setattr(cli_module, "LOG_FILE", str(log))
+        monkeypatch.setattr(
+            cli_module, "_get_ollama_tags",
+            lambda: (True, {"llama3.1:8b"}, ["llama3.1:8b"]),
+        )
+
+        result = CliRunner().invoke(cli_module.cli, ["status", "--json"])
+
+        assert result.exit_code == 0
+        assert json.loads(result.output) == {
+            "running": False,
+            "pid": None,
+            "uptime_s": None,
+            "ollama": True,
+            "models": ["llama3.1:8b"],
+            "log_size": 42,
+        }
+
+
+class TestOllamaTags:
+    """Test suite for the /api/tags probe."""
+
+    def test_names_parsed_in_order(self, monkeypatch):
+        """Test that model names come back as a set and in listing order."""
+        class FakeResponse:
+            status_code = 200
+            content = b'{"models": [{"name": "qwen3:8b", "size": 1}, {"name": "nomic-embed-text"}]}'
+
+        class FakeClient:
+            def get(self, path):
+                assert path == "/api/tags"
+                return FakeResponse()
+
+        monkeypatch.setattr(cli_module, "_ollama_client", FakeClient)
+        monkeypatch.setattr(cli_module, "_tags_cache", {"ts": 0.0, "data": None})
+
+        reachable, names, ordered = cli_module._get_ollama_tags()
+
+        assert reachable is True
+        assert names == {"qwen3:8b", "nomic-embed-text"}
+        assert ordered == ["qwen3:8b", "nomic-embed-text"]
+
+    def test_unreachable(self, monkeypatch):
+        """Test that connection errors report Ollama as down."""
+        class FailingClient:
+            def get(self, path):
+                raise OSError("connection refused")
+
+        monkeypatch.setattr(cli_module, "_ollama_client", FailingClient)
+        monkeypatch.setattr(cli_module, "_tags_cache", {"ts": 0.0, "data": None})
+
+        assert cli_module._get_ollama_tags() == (False, set(), [])
+
+
+class TestCheckOllama:
+    """Test suite for the Ollama reachability probe."""
+
+    def test_listening_port(self, monkeypatch):
+        """Test that an open port counts as reachable."""
+        with socket.socket() as server:
+            server.bind(("127.0.0.1", 0))
+            server.listen()
+            monkeypatch.setattr(cli_module, "OLLAMA_ADDR", server.getsockname())
+
+            assert cli_module._check_ollama() is True
+
+    def test_closed_port(self, monkeypatch):
+        """Test that a refused connection counts as unreachable."""
+        with socket.socket() as probe:
+            probe.bind(("127.0.0.1", 0))
+            addr = probe.getsockname()
+        monkeypatch.setattr(cli_module, "OLLAMA_ADDR", addr)
+
+        assert cli_module._check_ollama() is False
+
+
+class TestDoctorModels:
+    """Test suite for doctor's model presence check."""
+
+    def test_tag_matching(self, tmp_path, monkeypatch):
+        """Test exact and tag-less matches, without substring false positives."""
+        monkeypatch.setattr(cli_module, "CONFIG_DIR", str(tmp_path))
+        monkeypatch.setattr(cli_module, "DATA_DIR", str(tmp_path))
+        monkeypatch.setattr(cli_module, "_load_config", lambda: {
+            "MODEL": "qwen3:8b",
+            "VISION_MODEL": "llama3",
+            "RAG": {"EMBEDDING_MODEL": "nomic-embed-text", "OCR_MODEL": "glm-ocr:latest"},
+        })
+        existing = ["qwen3:8b", "llama3.2-vision:latest", "nomic-embed-text:latest",
+                    "glm-ocr:latest"]
+        monkeypatch.setattr(cli_module, "_get_ollama_tags",
+                            lambda: (True, set(existing), existing))
+
+        # Decline the Python installer offer on interpreters other than 3.12
+        result = CliRunner().invoke(cli_module.cli, ["doctor"], input="n\n")
+
+        assert "✓ MODEL: qwen3:8b found" in result.output
+        assert "✓ EMBEDDING: nomic-embed-text found" in result.output
+        assert "✗ VISION_MODEL: llama3 (not downloaded" in result.output
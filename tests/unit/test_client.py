@@ -3,7 +3,7 @@ import pytest
 from unittest.mock import AsyncMock, patch, MagicMock
 import json
 
-from src.client import OllamaClient
+from src.client import MAX_ERROR_DETAIL, OllamaClient, _iter_ndjson
 
 
 class TestOllamaClient:
@@ -14,6 +14,7 @@ class TestOllamaClient:
         """Create test client."""
         # Reset shared client to ensure mocks work
         OllamaClient._shared_client = None
+        OllamaClient._embedding_cache.clear()
         return OllamaClient(base_url="http://localhost:11434")
     
     @pytest.mark.asyncio
@@ -32,9 +33,13 @@ class TestOllamaClient:
                 except StopIteration:
                     raise StopAsyncIteration
 
-        mock_response.aiter_lines = MagicMock(return_value=AsyncIterator([
-            json.dumps({"message": {"content": "Hello"}, "done": False}),
-            json.dumps({"message": {"content": " world"}, "done": True}),
+        body = (
+            json.dumps({"message": {"content": "Hello"}, "done": False}) + "\n"
+            + json.dumps({"message": {"content": " world"}, "done": True}) + "\n"
+        ).encode()
+        # Chunk boundaries don't line up with the NDJSON records
+        mock_response.aiter_bytes = MagicMock(return_value=AsyncIterator([
+            body[:10], body[10:50], body[50:],
         ]))
         
         # Create async context manager mock for stream
@@ -51,7 +56,7 @@ class TestOllamaClient:
             async for chunk in client.stream_chat("test-model", [{"role": "user", "content": "Hi"}]):
                 chunks.append(chunk)
             
-            assert "Hello" in "".join(chunks)
+            assert "".join(chunks) == "Hello world"
     
     @pytest.mark.asyncio
     async def test_stream_chat_connection_error(self, client):
@@ -67,6 +72,31 @@ class TestOllamaClient:
             
             assert any("Error" in chunk for chunk in chunks)
     
+    @pytest.mark.asyncio
+    async def test_stream_chat_error_detail_truncated(self, client):
+        """Test that a huge error body is cut to MAX_ERROR_DETAIL characters."""
+        mock_response = MagicMock()
+        mock_response.status_code = 500
+
+        async def aiter_text():
+            for _ in range(1000):
+                yield "x" * 1000
+
+        mock_response.aiter_text = aiter_text
+        stream_context = AsyncMock()
+        stream_context.__aenter__ = AsyncMock(return_value=mock_response)
+        stream_context.__aexit__ = AsyncMock(return_value=None)
+
+        with patch("httpx.AsyncClient") as mock_client_cls:
+            mock_client_cls.return_value.stream = MagicMock(return_value=stream_context)
+
+            chunks = [c async for c in client.stream_chat("test-model", [])]
+
+        assert len(chunks) == 1
+        assert "status 500" in chunks[0]
+        assert chunks[0].endswith("x" * MAX_ERROR_DETAIL)
+        assert chunks[0].count("x") == MAX_ERROR_DETAIL
+
     @pytest.mark.asyncio
     async def test_describe_image(self, client):
         """Test image description."""
@@ -92,3 +122,136 @@ class TestOllamaClient:
             
             result = await client.unload_model("test-model")
             assert result == True
+
+    @pytest.mark.asyncio
+    async def test_generate_embedding_cached(self, client):
+        """Test that a repeated (model, text) pair is served from the cache."""
+        mock_response = MagicMock()
+        mock_response.status_code = 200
+        mock_response.json.return_value = {"embeddings": [[0.1, 0.2]]}
+
+        with patch("httpx.AsyncClient") as mock_client_cls:
+            post = mock_client_cls.return_value.post = AsyncMock(return_value=mock_response)
+
+            first = await client.generate_embedding("embed", "hello")
+            second = await client.generate_embedding("embed", "hello")
+            await client.generate_embedding("other-embed", "hello")
+
+        assert first == second == [0.1, 0.2]
+        assert post.await_count == 2
+
+    @pytest.mark.asyncio
+    async def test_generate_embeddings_batch(self, client):
+        """Test that one /api/embed call covers every text not yet cached."""
+        mock_response = MagicMock()
+        mock_response.status_code = 200
+
+        with patch("httpx.AsyncClient") as mock_client_cls:
+            post = mock_client_cls.return_value.post = AsyncMock(return_value=mock_response)
+            mock_response.json.return_value = {"embeddings": [[1.0]]}
+            await client.generate_embedding("embed", "b")
+
+            mock_response.json.return_value = {"embeddings": [[0.0], [2.0]]}
+            result = await client.generate_embeddings("embed", ["a", "b", "c"])
+
+        assert result == [[0.0], [1.0], [2.0]]
+        assert post.await_count == 2
+        url = post.await_args.args[0]
+        assert url.endswith("/api/embed")
+        assert post.await_args.kwargs["json"] == {"model": "embed", "input": ["a", "c"]}
+
+    @pytest.mark.asyncio
+    async def test_generate_embeddings_legacy_fallback(self, client):
+        """Test falling back to /api/embeddings when /api/embed is missing."""
+        missing_endpoint = MagicMock()
+        missing_endpoint.status_code = 404
+        # Old Ollama answers unknown routes with a plain-text body
+        missing_endpoint.text = "404 page not found"
+        missing_endpoint.json.side_effect = json.JSONDecodeError("Expecting value", "404", 0)
+        legacy = MagicMock()
+        legacy.status_code = 200
+        legacy.json.side_effect = [{"embedding": [1.0]}, {"embedding": [2.0]}]
+
+        with patch("httpx.AsyncClient") as mock_client_cls:
+            post = mock_client_cls.return_value.post = AsyncMock(
+                side_effect=[missing_endpoint, legacy, legacy]
+            )
+
+            result = await client.generate_embeddings("embed", ["a", "b"])
+
+        assert result == [[1.0], [2.0]]
+        urls = [call.args[0] for call in post.await_args_list]
+        assert urls[0].endswith("/api/embed")
+        assert all(url.endswith("/api/embeddings") for url in urls[1:])
+        assert post.await_args_list[1].kwargs["json"] == {"model": "embed", "prompt": "a"}
+
+    @pytest.mark.asyncio
+    async def test_generate_embeddings_missing_model(self, client):
+        """Test that a missing-model 404 is reported, not retried on the old endpoint."""
+        missing_model = MagicMock()
+        missing_model.status_code = 404
+        missing_model.text = '{"error":"model \'nomic-embd\' not found"}'
+        missing_model.json.return_value = {"error": "model 'nomic-embd' not found"}
+
+        with patch("httpx.AsyncClient") as mock_client_cls, \
+                patch("src.client.logger") as mock_logger:
+            post = mock_client_cls.return_value.post = AsyncMock(return_value=missing_model)
+
+            result = await client.generate_embeddings("nomic-embd", ["a", "b"])
+
+        assert result == [[], []]
+        assert post.await_count == 1
+        assert "not found" in mock_logger.error.call_args.args[0]
+
+    @pytest.mark.asyncio
+    async def test_generate_embedding_failure_not_cached(self, client):
+        """Test that failed lookups are retried instead of cached."""
+        mock_response = MagicMock()
+        mock_response.status_code = 500
+        mock_response.text = "boom"
+
+        with patch("httpx.AsyncClient") as mock_client_cls:
+            post = mock_client_cls.return_value.post = AsyncMock(return_value=mock_response)
+
+            assert await client.generate_embedding("embed", "hello") == []
+            assert await client.generate_embedding("embed", "hello") == []
+
+        assert post.await_count == 2
+
+    @pytest.mark.asyncio
+    async def test_aclose_resets_shared_client(self, client):
+        """Test that closing drops the shared client so the next call reopens it."""
+        first = client._get_client()
+
+        await OllamaClient.aclose()
+
+        assert first.is_closed
+        assert OllamaClient._shared_client is None
+        second = client._get_client()
+        assert second is not first
+        await OllamaClient.aclose()
+
+
+class TestIterNdjson:
+    """Test suite for the NDJSON byte splitter."""
+
+    @staticmethod
+    async def _collect(chunks):
+        async def source():
+            for chunk in chunks:
+                yield chunk
+        return [line async for line in _iter_ndjson(source())]
+
+    @pytest.mark.asyncio
+    async def test_lines_split_across_chunks(self):
+        """Test records that span chunk boundaries, with blank lines dropped."""
+        lines = await self._collect([b'{"a":', b' 1}\n\n{"b"', b': 2}\n{"c": 3}\n'])
+
+        assert lines == [b'{"a": 1}', b'{"b": 2}', b'{"c": 3}']
+
+    @pytest.mark.asyncio
+    async def test_trailing_record_without_newline(self):
+        """Test that a final record without a newline is still yielded."""
+        assert await self._collect([b'{"a": 1}\n{"done"', b': true}']) == [
+            b'{"a": 1}', b'{"done": true}'
+        ]
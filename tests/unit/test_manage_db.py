@@ -0,0 +1,46 @@
+"""Unit tests for the manage_db script."""
+import pytest
+
+chromadb = pytest.importorskip("chromadb")
+from chromadb.config import Settings
+
+from scripts.manage_db import search_entries
+
+
+@pytest.fixture
+def collection():
+    """In-memory collection holding a few documents."""
+    client = chromadb.EphemeralClient(settings=Settings(anonymized_telemetry=False))
+    col = client.get_or_create_collection("search_test")
+    col.add(
+        ids=["op", "meta", "plain"],
+        documents=["filter with $and=x in it", "tagged note", "nothing here"],
+        metadatas=[{"source": "a.txt"}, {"source": "notes.pdf"}, {"source": "b.txt"}],
+        embeddings=[[1.0, 0.0], [0.0, 1.0], [1.0, 1.0]],
+    )
+    yield col
+    client.delete_collection("search_test")
+
+
+class TestSearchEntries:
+    """Test suite for the interactive search."""
+
+    def test_operator_like_key_falls_back_to_text(self, collection, monkeypatch, capsys):
+        """Test that a "$and=x" query is matched as text, not as a filter."""
+        monkeypatch.setattr("builtins.input", lambda prompt="": "$and=x")
+
+        search_entries(collection)
+
+        out = capsys.readouterr().out
+        assert "Error searching" not in out
+        assert "ID: op" in out
+
+    def test_metadata_key_value(self, collection, monkeypatch, capsys):
+        """Test that a plain key=value query uses the metadata filter."""
+        monkeypatch.setattr("builtins.input", lambda prompt="": "source=notes.pdf")
+
+        search_entries(collection)
+
+        out = capsys.readouterr().out
+        assert "ID: meta" in out
+        assert "ID: op" not in out
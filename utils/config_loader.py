@@ -9,6 +9,9 @@ logger = logging.getLogger(__name__)
 _config: Optional[Dict[str, Any]] = None
 _config_path: Optional[str] = None
 
+# libyaml's C loader parses several times faster; not every PyYAML build has it
+_SafeLoader = getattr(yaml, "CSafeLoader", yaml.SafeLoader)
+
 # Default configuration values
 DEFAULT_CONFIG = {
     "MODEL": "qwen3:8b",
@@ -83,7 +86,7 @@ def load_config(force_reload: bool = False) -> Dict[str, Any]:
     
     try:
         with open(config_path, "r", encoding="utf-8") as f:
-            loaded_config = yaml.safe_load(f)
+            loaded_config = yaml.load(f, Loader=_SafeLoader)
         
         if loaded_config is None:
             logger.warning(f"Config file is empty. Using defaults.")